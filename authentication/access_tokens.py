@@ -0,0 +1,120 @@
+"""
+Optional stateless access tokens with rotated refresh tokens.
+
+With ``ACCESS_TOKENS['ENABLED']`` set, login and register return a
+short-lived signed access token and a refresh token instead of a DRF
+``Token``; clients send ``Authorization: Bearer <access>``.
+
+Access tokens are ``django.core.signing`` strings (HMAC-SHA256 over
+SECRET_KEY) carrying the user id and the user's ``token_version``.
+``SignedTokenAuthentication`` checks the signature and age without touching
+the database and resolves the user through ``token_cache``, like
+``CachedTokenAuthentication``. Logout and password changes bump
+``token_version``, which revokes all of the user's access tokens at once.
+``token_cache`` checks the user's shared version on every hit, so no
+process keeps accepting them from a cached copy.
+
+Refresh tokens are random strings stored as SHA-256 digests in
+``RefreshToken``. Each use (``POST token/refresh/``) revokes the token and
+issues a new pair. A refresh token that is presented again after it was
+rotated has been copied, so its whole family is revoked.
+"""
+
+import datetime
+import hashlib
+import secrets
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+
+from .models import RefreshToken
+from .token_cache import token_cache
+
+DEFAULTS = {
+    'ENABLED': False,
+    # Seconds an access token is accepted for
+    'ACCESS_TTL': 300,
+    'REFRESH_TTL': 14 * 24 * 3600,
+    'SALT': 'authentication.access_tokens',
+}
+
+
+def digest(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class AccessTokens:
+    def __init__(self, options=None):
+        self.options = {**DEFAULTS, **(options or {})}
+
+    @property
+    def enabled(self):
+        return self.options['ENABLED']
+
+    def sign(self, user):
+        return signing.dumps({'u': user.pk, 'v': user.token_version}, salt=self.options['SALT'])
+
+    def verify(self, token):
+        """``(user id, token version)`` for a valid, unexpired access token, else ``None``."""
+        try:
+            claims = signing.loads(token, salt=self.options['SALT'], max_age=self.options['ACCESS_TTL'])
+        except signing.BadSignature:
+            return None
+        return claims['u'], claims['v']
+
+    def issue(self, user, family=None):
+        """Store a new refresh token for ``user``; return the response fields."""
+        refresh = secrets.token_urlsafe(32)
+        RefreshToken.objects.create(
+            user=user,
+            digest=digest(refresh),
+            family=family or uuid.uuid4(),
+            expires_at=timezone.now() + datetime.timedelta(seconds=self.options['REFRESH_TTL']),
+        )
+        return {
+            'access': self.sign(user),
+            'refresh': refresh,
+            'token_type': 'Bearer',
+            'expires_in': self.options['ACCESS_TTL'],
+        }
+
+    def rotate(self, refresh):
+        """Exchange a refresh token for ``(user, new tokens)``; raises AuthenticationFailed."""
+        now = timezone.now()
+        with transaction.atomic():
+            stored = (
+                RefreshToken.objects.select_for_update().select_related('user')
+                .filter(digest=digest(refresh)).first()
+            )
+            if stored is None or stored.expires_at <= now or not stored.user.is_active:
+                stored = None
+            elif stored.revoked_at is not None:
+                # Committed before failing, unlike an exception raised here
+                RefreshToken.objects.filter(
+                    family=stored.family, revoked_at__isnull=True
+                ).update(revoked_at=now)
+                stored = None
+            else:
+                stored.revoked_at = now
+                stored.save(update_fields=['revoked_at'])
+                return stored.user, self.issue(stored.user, stored.family)
+        raise exceptions.AuthenticationFailed(_('Invalid or expired refresh token.'))
+
+    def revoke_user(self, user):
+        """Invalidate every access and refresh token ``user`` holds."""
+        with transaction.atomic():
+            # In SQL, so concurrent revocations each count
+            type(user).objects.filter(pk=user.pk).update(token_version=F('token_version') + 1)
+            user.refresh_from_db(fields=['token_version'])
+            RefreshToken.objects.filter(user=user, revoked_at__isnull=True).update(revoked_at=timezone.now())
+        # update() sends no post_save; drop the cached users here
+        token_cache.invalidate_user(user.pk)
+
+
+access_tokens = AccessTokens(getattr(settings, 'ACCESS_TOKENS', None))
@@ -1,6 +1,112 @@
+import hashlib
+
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.core.validators import validate_email
+from django.db import connections
+from django.db.models import Case, IntegerField, Value, When
+from django.utils.functional import cached_property
+from .models import User, normalize_identifier
+from .search import search_index
+
+CHANGELIST_DEFAULTS = {
+    # Unfiltered changelists above this many rows (by table statistics)
+    # show the estimate instead of running COUNT(*); None disables it
+    'ESTIMATE_COUNT_ABOVE': 100000,
+    # Seconds to cache exact counts, e.g. for filtered changelists
+    'COUNT_CACHE_TIMEOUT': 30,
+}
+
+
+def estimated_row_count(model, using='default'):
+    """Row count from the database's table statistics, or None if unknown."""
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT table_rows FROM information_schema.tables '
+                'WHERE table_schema = DATABASE() AND table_name = %s', [table]
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [table])
+        elif connection.vendor == 'sqlite':
+            # Filled in by ANALYZE; the first number is the table's row count
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+            )
+            if cursor.fetchone() is None:
+                return None
+            cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table])
+        else:
+            return None
+        row = cursor.fetchone()
+    if row is None or row[0] is None:
+        return None
+    return int(str(row[0]).split()[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    A paginator that avoids COUNT(*) on large tables.
+
+    Unfiltered querysets on a table whose statistics put it above
+    ESTIMATE_COUNT_ABOVE rows use that estimate; every other count is exact
+    but cached for COUNT_CACHE_TIMEOUT seconds per query.
+    """
+    
+    @cached_property
+    def count(self):
+        options = {**CHANGELIST_DEFAULTS, **getattr(settings, 'ADMIN_CHANGELIST', {})}
+        queryset = self.object_list
+        threshold = options['ESTIMATE_COUNT_ABOVE']
+        if threshold is not None and not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > threshold:
+                return estimate
+        
+        try:
+            sql = str(queryset.query)
+        except EmptyResultSet:
+            # e.g. none() or pk__in=[]: nothing to count
+            return 0
+        key = 'admin-count:%s' % hashlib.md5(sql.encode()).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, options['COUNT_CACHE_TIMEOUT'])
+        return count
+
+
+class LeanChangeList(ChangeList):
+    """
+    Only loads the columns the changelist displays, and lists trigram search
+    results best match first unless a column ordering was picked.
+    """
+    
+    def get_ordering(self, request, queryset):
+        if 'search_score' in queryset.query.annotations and ORDER_VAR not in self.params:
+            return ['-search_score', '-pk']
+        return super().get_ordering(request, queryset)
+    
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        fields = []
+        for name in self.list_display:
+            if name == 'action_checkbox':
+                continue
+            try:
+                fields.append(self.model._meta.get_field(name).name)
+            except FieldDoesNotExist:
+                # A method or __str__ may read any column
+                return queryset
+        return queryset.only(*fields)
+
 
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
@@ -52,3 +158,39 @@ class UserAdmin(BaseUserAdmin):
     )
     
     readonly_fields = ('date_joined', 'last_login')
+    
+    # Changelist tuning for large tables: a single (estimated or cached)
+    # count instead of two COUNT(*) queries, and only the displayed columns
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
+    def get_changelist(self, request, **kwargs):
+        return LeanChangeList
+    
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        # A full email address can only match one row; look it up through
+        # the unique index instead of scanning with icontains
+        try:
+            validate_email(search_term.strip())
+        except ValidationError:
+            pass
+        else:
+            return queryset.filter(email=normalize_identifier(search_term)), False
+        # The trigram index only covers names, usernames and the local part
+        # of emails, and its candidate list is capped. Domains and other
+        # partial addresses, terms too short for trigrams, terms without
+        # trigram hits and terms matching more rows than the cap go to the
+        # stock icontains search, so nothing it would find is dropped.
+        if '@' in search_term or '.' in search_term:
+            return super().get_search_results(request, queryset, search_term)
+        hits, total = search_index.candidates(search_term, self.list_max_show_all)
+        if not hits or len(hits) >= self.list_max_show_all * search_index.options['CANDIDATE_FACTOR']:
+            return super().get_search_results(request, queryset, search_term)
+        # Prefix and fuzzy matches, most shared trigrams first
+        score = Case(
+            *[When(pk=pk, then=Value(count)) for pk, count in hits.items()],
+            default=Value(0), output_field=IntegerField(),
+        )
+        return queryset.filter(pk__in=list(hits)).annotate(search_score=score), False
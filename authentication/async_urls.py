@@ -0,0 +1,14 @@
+from django.urls import path
+from . import async_views
+
+app_name = 'authentication_async'
+
+urlpatterns = [
+    path('register/', async_views.register, name='register'),
+    path('login/', async_views.login, name='login'),
+    path('logout/', async_views.logout, name='logout'),
+    path('profile/', async_views.profile, name='profile'),
+    path('user-info/', async_views.user_info, name='user_info'),
+    path('check-email/', async_views.check_email_exists, name='check_email'),
+    path('check-username/', async_views.check_username_exists, name='check_username'),
+]
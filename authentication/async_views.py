@@ -0,0 +1,314 @@
+"""
+Async (ASGI) versions of the authentication endpoints.
+
+These mirror the DRF views in ``views.py`` and return byte-identical JSON,
+but run natively on the event loop when served through ``asgi.py``:
+
+* password hashing is awaited on ``hash_pool`` so the loop keeps serving
+  other requests while a hash runs;
+* token lookups go through ``token_cache`` in a worker thread, since even
+  a hit checks the user's version in the shared cache;
+* everything touching the database runs through ``sync_to_async``. Django
+  3.2 has no async ORM (``aget()``/``aexists()`` arrived in 4.1), so this is
+  the supported way to reach the ORM from async code;
+* rate limiter and profile cache calls stay on the loop only while they are
+  in-process (the ``local`` limiter backend, ``LocMemCache``); with a cache
+  server they are network round trips and run through ``sync_to_async``.
+
+Session login is not offered here; these endpoints are for token clients.
+"""
+
+import asyncio
+import functools
+import json
+import math
+from collections.abc import Mapping
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model, user_logged_in
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.http import HttpResponse
+from rest_framework import exceptions, status
+from rest_framework.authtoken.models import Token
+
+from .access_tokens import access_tokens
+from .authentication import CachedTokenAuthentication, SignedTokenAuthentication
+from .availability import availability_index
+from .backends import EmailOrUsernameBackend
+from .compiled_serializers import user_profile
+from .hash_pool import PasswordHashingBusy, hash_pool, verify_password
+from .profile_cache import profile_cache
+from .ratelimit import CheckThrottle, LoginThrottle, RegisterThrottle, client_ip, rate_limiter
+from .renderers import JSONRenderer
+from .serializers import (
+    UserRegistrationSerializer,
+    UserLoginSerializer,
+    UserProfileSerializer,
+    identifier_value,
+)
+from .token_cache import token_cache
+
+User = get_user_model()
+
+renderer = JSONRenderer()
+backend = EmailOrUsernameBackend()
+token_authentication = CachedTokenAuthentication()
+signed_authentication = SignedTokenAuthentication()
+
+
+def json_response(data, status=status.HTTP_200_OK, headers=None):
+    response = HttpResponse(
+        renderer.render(data), status=status, content_type='application/json'
+    )
+    for name, value in (headers or {}).items():
+        response[name] = value
+    return response
+
+
+async def run_hash(func, *args):
+    """Await ``func(*args)`` on the hash pool without blocking the loop."""
+    return await asyncio.wrap_future(hash_pool.submit(func, *args))
+
+
+async def authenticate_request(request):
+    """Resolve the ``Authorization: Token`` (or ``Bearer``) header, or return ``None``."""
+    auth = request.META.get('HTTP_AUTHORIZATION', '').split()
+    if auth and auth[0].lower() == signed_authentication.keyword.lower():
+        result = await sync_to_async(signed_authentication.authenticate)(request)
+        return result[0] if result else None
+
+    result = await sync_to_async(token_authentication.authenticate)(request)
+    return result[0] if result else None
+
+
+def parse_body(request):
+    """JSON bodies are decoded; form and multipart bodies use request.POST."""
+    if request.content_type == 'application/json':
+        return json.loads(request.body) if request.body else {}
+    return request.POST.dict()
+
+
+async def rate_limit_wait(request, throttle):
+    """``rate_limiter.check`` for ``throttle``'s scope; 0 if the request may go on."""
+    identifier = None
+    if throttle.identifier_field and isinstance(request.data, Mapping):
+        identifier = request.data.get(throttle.identifier_field)
+    return await off_loop(
+        limiter_is_remote(), rate_limiter.check, throttle.scope, client_ip(request), identifier
+    )
+
+
+def limiter_is_remote():
+    return rate_limiter.options['BACKEND'] == 'cache'
+
+
+def cache_is_remote(cache):
+    return not isinstance(cache, LocMemCache)
+
+
+async def off_loop(remote, func, *args):
+    """``func(*args)``; in a worker thread if it makes a round trip to a cache server."""
+    if remote:
+        return await sync_to_async(func)(*args)
+    return func(*args)
+
+
+async def profile_response(request, user):
+    return await off_loop(cache_is_remote(profile_cache.cache), profile_cache.response, request, user)
+
+
+def async_api_view(methods, authenticated=False, throttle=None):
+    """
+    The async counterpart of ``@api_view`` + ``@permission_classes`` (and
+    ``@throttle_classes`` with one of the ``ratelimit`` throttles).
+
+    Django 3.2's ``csrf_exempt`` and ``require_http_methods`` wrap views in
+    sync functions, which would hide the coroutine from the handler, so this
+    decorator does both jobs itself.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return json_response(
+                    {'detail': f'Method "{request.method}" not allowed.'},
+                    status=status.HTTP_405_METHOD_NOT_ALLOWED,
+                    headers={'Allow': ', '.join(methods)},
+                )
+
+            try:
+                request.data = parse_body(request)
+            except ValueError as e:
+                return json_response(
+                    {'detail': f'JSON parse error - {e}'}, status=status.HTTP_400_BAD_REQUEST
+                )
+
+            if throttle is not None:
+                wait = await rate_limit_wait(request, throttle)
+                if wait:
+                    e = exceptions.Throttled(wait)
+                    return json_response(
+                        {'detail': e.detail}, status=e.status_code,
+                        headers={'Retry-After': str(math.ceil(wait))},
+                    )
+
+            try:
+                # Replaces AuthenticationMiddleware's lazy user, which would
+                # hit the session table from the event loop.
+                request.user = await authenticate_request(request) or AnonymousUser()
+            except exceptions.AuthenticationFailed as e:
+                return json_response(
+                    {'detail': e.detail}, status=e.status_code,
+                    headers={'WWW-Authenticate': token_authentication.keyword},
+                )
+            if authenticated and not request.user.is_authenticated:
+                return json_response(
+                    {'detail': exceptions.NotAuthenticated.default_detail},
+                    status=status.HTTP_401_UNAUTHORIZED,
+                    headers={'WWW-Authenticate': token_authentication.keyword},
+                )
+
+            try:
+                return await view(request, *args, **kwargs)
+            except PasswordHashingBusy as e:
+                return json_response(
+                    {'detail': e.detail}, status=e.status_code,
+                    headers={'Retry-After': str(e.wait)},
+                )
+
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+def invalid(errors):
+    return json_response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@sync_to_async
+def create_user_with_token(serializer, password_hash):
+    with transaction.atomic():
+        user = serializer.save(password_hash=password_hash)
+        if access_tokens.enabled:
+            tokens = access_tokens.issue(user)
+        else:
+            tokens = {'token': Token.objects.create(user=user).key}
+    return user, tokens
+
+
+@async_api_view(['POST'], throttle=RegisterThrottle)
+async def register(request):
+    serializer = UserRegistrationSerializer(data=request.data)
+    if not await sync_to_async(serializer.is_valid)():
+        return invalid(serializer.errors)
+
+    password_hash = await run_hash(make_password, serializer.validated_data['password'])
+    user, tokens = await create_user_with_token(serializer, password_hash)
+    return json_response({
+        'message': 'User registered successfully',
+        'user': user_profile.to_representation(user),
+        **tokens
+    }, status=status.HTTP_201_CREATED)
+
+
+@sync_to_async
+def complete_login(request, user):
+    # update_last_login is connected to this signal, as login() would do.
+    user_logged_in.send(sender=user.__class__, request=request, user=user)
+    if access_tokens.enabled:
+        return access_tokens.issue(user)
+    token, created = Token.objects.get_or_create(user=user)
+    return {'token': token.key}
+
+
+@async_api_view(['POST'], throttle=LoginThrottle)
+async def login(request):
+    serializer = UserLoginSerializer(data=request.data)
+    # Field-level validation only; credentials are checked below so that
+    # the hash runs on the pool instead of inside authenticate().
+    try:
+        attrs = serializer.to_internal_value(request.data)
+    except exceptions.ValidationError as e:
+        return invalid(e.detail)
+
+    password = attrs['password']
+    user = await sync_to_async(backend.get_user_by_identifier)(attrs['email_or_username'])
+    if user is None:
+        await run_hash(make_password, password)
+        await off_loop(limiter_is_remote(), rate_limiter.login_failed, attrs['email_or_username'])
+        return invalid({'non_field_errors': ['Invalid credentials']})
+
+    is_correct, must_update = await run_hash(verify_password, password, user.password)
+    if not is_correct or not backend.user_can_authenticate(user):
+        await off_loop(limiter_is_remote(), rate_limiter.login_failed, attrs['email_or_username'], user)
+        return invalid({'non_field_errors': ['Invalid credentials']})
+    await off_loop(limiter_is_remote(), rate_limiter.login_succeeded, attrs['email_or_username'], user)
+    if must_update:
+        user.password = await run_hash(make_password, password)
+        await sync_to_async(user.save)(update_fields=['password'])
+
+    tokens = await complete_login(request, user)
+    return json_response({
+        'message': 'Login successful',
+        'user': user_profile.to_representation(user),
+        **tokens
+    })
+
+
+@sync_to_async
+def delete_token(user):
+    for token in Token.objects.filter(user=user):
+        token_cache.invalidate(token.key)
+        token.delete()
+    if access_tokens.enabled:
+        access_tokens.revoke_user(user)
+
+
+@async_api_view(['POST'], authenticated=True)
+async def logout(request):
+    await delete_token(request.user)
+    return json_response({'message': 'Logout successful'})
+
+
+@sync_to_async
+def update_profile(serializer):
+    if serializer.is_valid():
+        serializer.save()
+        return True
+    return False
+
+
+@async_api_view(['GET', 'PUT', 'PATCH'], authenticated=True)
+async def profile(request):
+    if request.method == 'GET':
+        return await profile_response(request, request.user)
+
+    serializer = UserProfileSerializer(
+        request.user, data=request.data, partial=request.method == 'PATCH'
+    )
+    if not await update_profile(serializer):
+        return invalid(serializer.errors)
+    return json_response(serializer.data)
+
+
+@async_api_view(['GET'], authenticated=True)
+async def user_info(request):
+    return await profile_response(request, request.user)
+
+
+def check_view(field, error):
+    @async_api_view(['POST'], throttle=CheckThrottle)
+    async def view(request):
+        value = identifier_value(request.data, field)
+        if value is None:
+            return json_response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        exists = await sync_to_async(availability_index.exists)(field, value)
+        return json_response({'exists': exists})
+    return view
+
+
+check_email_exists = check_view('email', 'Email is required')
+check_username_exists = check_view('username', 'Username is required')
@@ -0,0 +1,82 @@
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, TokenAuthentication, get_authorization_header
+
+from .access_tokens import access_tokens
+from .token_cache import token_cache
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in replacement for DRF's TokenAuthentication.
+
+    Token keys are resolved through ``token_cache`` so hot tokens do not hit
+    the database. ``request.auth`` is a Token instance in both cases; on a
+    cache hit it is an unsaved copy carrying the same key and user.
+
+    A miss looks up the token's user id first, so the user's cache version
+    can be read before the user is loaded.
+    """
+
+    def authenticate_credentials(self, key):
+        user = token_cache.get(key)
+        if user is None:
+            user_id = self.get_model().objects.filter(key=key).values_list('user_id', flat=True).first()
+            if user_id is None:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            version = token_cache.version(user_id)
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, user, version)
+            return (user, token)
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return (user, self.get_model()(key=key, user=user))
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+    ``Authorization: Bearer <access token>`` for signed access tokens.
+
+    The signature and age are checked without the database; the user comes
+    from ``token_cache`` and only a miss loads it. ``request.auth`` is the
+    access token string. Does nothing unless ACCESS_TOKENS is enabled.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode() or not access_tokens.enabled:
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(_('Invalid token header.'))
+        try:
+            token = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(_('Invalid token header.'))
+        return self.authenticate_credentials(token)
+
+    def authenticate_credentials(self, token):
+        claims = access_tokens.verify(token)
+        if claims is None:
+            raise exceptions.AuthenticationFailed(_('Invalid or expired token.'))
+        user_id, version = claims
+
+        user = token_cache.get_user(user_id)
+        if user is None:
+            cache_version = token_cache.version(user_id)
+            user = get_user_model().objects.filter(pk=user_id).first()
+            if user is None:
+                raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+            token_cache.set_user(user, cache_version)
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        if user.token_version != version:
+            raise exceptions.AuthenticationFailed(_('Token has been revoked.'))
+        return (user, token)
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -0,0 +1,305 @@
+"""
+In-memory availability index for the check-email / check-username endpoints.
+
+Every email and username is added to a Bloom filter. A value the filter has
+never seen is definitely available and is answered without touching the
+database; a possible hit is confirmed with an ``exists()`` query. Values are
+stripped and lower-cased, the form ``User.save`` stores, both before hashing
+and in that query, so case variants get the same answer as the stored value.
+
+The index is built lazily on first use (from a snapshot in the shared cache
+when one is available, otherwise from the user table), topped up every
+``REFRESH_INTERVAL`` seconds with new rows and with rows whose ``updated_at``
+moved since the last refresh (an email or username changed in another
+process), and rebuilt from scratch every ``REBUILD_INTERVAL`` seconds.
+Registrations and edits in this process are added immediately through the
+``post_save`` signal.
+
+The lookup counters and the estimated false-positive rates are served with
+the request metrics at ``metrics/``.
+"""
+
+import hashlib
+import math
+import datetime
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Q
+from django.utils import timezone
+
+from .metrics import not_counted, registry
+
+DEFAULTS = {
+    'ENABLED': True,
+    'CAPACITY': 100000,
+    'ERROR_RATE': 0.01,
+    'REFRESH_INTERVAL': 5,
+    'REFRESH_OVERLAP': 100,
+    # Seconds of updated_at re-read before the last refresh, for clock skew
+    # between servers and transactions that commit late
+    'CHANGE_OVERLAP': 60,
+    'REBUILD_INTERVAL': 3600,
+    'CACHE_ALIAS': 'default',
+    'CACHE_KEY': 'availability-index',
+}
+
+FIELDS = ('email', 'username')
+
+
+class BloomFilter:
+    """A fixed-size Bloom filter using double hashing over BLAKE2b."""
+
+    def __init__(self, num_bits, num_hashes, bits=None):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.bits = bytearray(bits) if bits is not None else bytearray((num_bits + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity, error_rate):
+        """Size a filter to hold ``capacity`` items at ``error_rate``."""
+        capacity = max(capacity, 1)
+        num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        return cls(num_bits, num_hashes)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, value):
+        for pos in self._positions(value):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value))
+
+    def fill_ratio(self):
+        set_bits = sum(bin(byte).count('1') for byte in self.bits)
+        return set_bits / self.num_bits
+
+    def estimated_false_positive_rate(self):
+        return self.fill_ratio() ** self.num_hashes
+
+
+def normalize(value):
+    # Same as User's stored form (models.normalize_identifier)
+    return value.strip().lower()
+
+
+class AvailabilityIndex:
+    """Bloom filters over user emails and usernames plus hit/miss metrics."""
+
+    def __init__(self, options=None, clock=time.monotonic):
+        self.options = {**DEFAULTS, **(options or {})}
+        self.clock = clock
+        self.filters = None
+        self.high_water = 0
+        self.synced_at = None
+        self.built_at = None
+        self.refreshed_at = None
+        self._lock = threading.RLock()
+        self._counters_lock = threading.Lock()
+        self.reset_metrics()
+
+    def reset(self):
+        """Drop the filters and the shared snapshot; the next lookup rebuilds."""
+        with self._lock:
+            self.filters = None
+            self.high_water = 0
+        caches[self.options['CACHE_ALIAS']].delete(self.options['CACHE_KEY'])
+        self.reset_metrics()
+
+    def reset_metrics(self):
+        with self._counters_lock:
+            self.counters = {'lookups': 0, 'db_skips': 0, 'db_checks': 0, 'false_positives': 0}
+
+    def count(self, **increments):
+        with self._counters_lock:
+            for name, increment in increments.items():
+                self.counters[name] += increment
+
+    def _user_model(self):
+        from django.contrib.auth import get_user_model
+        return get_user_model()
+
+    # Building -----------------------------------------------------------
+
+    def build(self):
+        """Rebuild both filters from the user table and publish a snapshot."""
+        User = self._user_model()
+        synced_at = timezone.now()
+        capacity = max(self.options['CAPACITY'], 2 * User.objects.count())
+        filters = {
+            field: BloomFilter.for_capacity(capacity, self.options['ERROR_RATE'])
+            for field in FIELDS
+        }
+        high_water = 0
+        rows = User.objects.order_by('pk').values_list('pk', *FIELDS)
+        for pk, email, username in rows.iterator(chunk_size=5000):
+            filters['email'].add(normalize(email))
+            filters['username'].add(normalize(username))
+            high_water = pk
+
+        with self._lock:
+            self.filters = filters
+            self.high_water = high_water
+            self.synced_at = synced_at
+            self.built_at = self.refreshed_at = self.clock()
+        self.publish()
+        return self
+
+    def publish(self):
+        """Store the current filters in the shared cache for other processes."""
+        snapshot = {
+            'high_water': self.high_water,
+            'synced_at': self.synced_at,
+            'filters': {
+                field: (bloom.num_bits, bloom.num_hashes, bytes(bloom.bits))
+                for field, bloom in self.filters.items()
+            },
+        }
+        caches[self.options['CACHE_ALIAS']].set(
+            self.options['CACHE_KEY'], snapshot, self.options['REBUILD_INTERVAL']
+        )
+
+    def load(self):
+        """Adopt the shared snapshot if there is one, otherwise build."""
+        snapshot = caches[self.options['CACHE_ALIAS']].get(self.options['CACHE_KEY'])
+        if snapshot is None or 'synced_at' not in snapshot:
+            return self.build()
+        with self._lock:
+            self.filters = {
+                field: BloomFilter(*params) for field, params in snapshot['filters'].items()
+            }
+            self.high_water = snapshot['high_water']
+            self.synced_at = snapshot['synced_at']
+            self.built_at = self.clock()
+        return self.refresh()
+
+    def refresh(self):
+        """Add rows created or edited since the last build or refresh."""
+        # Auto-increment ids can commit out of order and clocks differ
+        # between servers, so re-read a few rows below the high-water mark
+        # and a margin before the last sync; re-adding a value is harmless.
+        floor = self.high_water - self.options['REFRESH_OVERLAP']
+        since = self.synced_at - datetime.timedelta(seconds=self.options['CHANGE_OVERLAP'])
+        synced_at = timezone.now()
+        rows = self._user_model().objects.filter(
+            Q(pk__gt=floor) | Q(updated_at__gte=since)
+        ).values_list('pk', *FIELDS)
+        with self._lock:
+            for pk, email, username in rows:
+                self.filters['email'].add(normalize(email))
+                self.filters['username'].add(normalize(username))
+                self.high_water = max(self.high_water, pk)
+            self.synced_at = synced_at
+            self.refreshed_at = self.clock()
+        return self
+
+    def ensure_fresh(self):
+        if self.filters is not None and self.clock() - self.refreshed_at < self.options['REFRESH_INTERVAL']:
+            return
+        # Periodic upkeep, not the cost of the request that happens to run it
+        with self._lock, not_counted():
+            now = self.clock()
+            if self.filters is None:
+                self.load()
+            elif now - self.built_at >= self.options['REBUILD_INTERVAL']:
+                self.build()
+            elif now - self.refreshed_at >= self.options['REFRESH_INTERVAL']:
+                self.refresh()
+
+    # Queries ------------------------------------------------------------
+
+    def add(self, email, username):
+        """Record a new or changed user; a no-op until the index is built."""
+        with self._lock:
+            if self.filters is not None:
+                self.filters['email'].add(normalize(email))
+                self.filters['username'].add(normalize(username))
+
+    def might_contain(self, field, value):
+        self.ensure_fresh()
+        return normalize(value) in self.filters[field]
+
+    def exists(self, field, value):
+        """Answer ``User.objects.filter(field=value).exists()`` via the index."""
+        if not self.options['ENABLED']:
+            return self._user_model().objects.filter(**{field: normalize(value)}).exists()
+
+        if not self.might_contain(field, value):
+            self.count(lookups=1, db_skips=1)
+            return False
+
+        exists = self._user_model().objects.filter(**{field: normalize(value)}).exists()
+        self.count(lookups=1, db_checks=1, false_positives=int(not exists))
+        return exists
+
+    def exists_many(self, field, values):
+        """Map each value to whether it exists, with at most one IN query."""
+        values = list(dict.fromkeys(values))
+        if self.options['ENABLED']:
+            candidates = [value for value in values if self.might_contain(field, value)]
+        else:
+            candidates = values
+
+        found = set()
+        if candidates:
+            rows = self._user_model().objects.filter(
+                **{f'{field}__in': {normalize(value) for value in candidates}}
+            ).values_list(field, flat=True)
+            found = set(rows)
+
+        result = {value: normalize(value) in found for value in values}
+        if self.options['ENABLED']:
+            self.count(
+                lookups=len(values),
+                db_skips=len(values) - len(candidates),
+                db_checks=len(candidates),
+                false_positives=sum(not result[value] for value in candidates),
+            )
+        return result
+
+    def metrics(self):
+        """Counters plus observed and estimated false-positive rates."""
+        with self._counters_lock:
+            data = dict(self.counters)
+        absent = data['db_skips'] + data['false_positives']
+        data['observed_false_positive_rate'] = data['false_positives'] / absent if absent else 0.0
+        filters = self.filters
+        if filters is not None:
+            for field, bloom in filters.items():
+                data[f'{field}_bits'] = bloom.num_bits
+                data[f'{field}_estimated_false_positive_rate'] = bloom.estimated_false_positive_rate()
+        return data
+
+    def collect(self):
+        """The metrics as families for ``registry.add_collector``."""
+        data = self.metrics()
+        families = [
+            (f'availability_{name}_total', 'counter', help_text, [({}, data[name])])
+            for name, help_text in (
+                ('lookups', 'Availability checks answered.'),
+                ('db_skips', 'Checks the Bloom filter answered without the database.'),
+                ('db_checks', 'Checks confirmed with a query.'),
+                ('false_positives', 'Confirmed checks that found no user.'),
+            )
+        ]
+        families.append((
+            'availability_estimated_false_positive_rate', 'gauge',
+            'False-positive rate estimated from the filter fill ratio.',
+            [
+                ({'field': field}, data[f'{field}_estimated_false_positive_rate'])
+                for field in FIELDS if f'{field}_estimated_false_positive_rate' in data
+            ],
+        ))
+        return families
+
+
+availability_index = AvailabilityIndex(getattr(settings, 'AVAILABILITY_INDEX', None))
+registry.add_collector(availability_index.collect)
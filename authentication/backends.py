@@ -0,0 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import Q
+
+from .hash_pool import hash_pool
+from .models import normalize_identifier
+
+UserModel = get_user_model()
+
+
+class EmailOrUsernameBackend(ModelBackend):
+    """
+    Authenticate with either an email address or a username.
+
+    The account is resolved with a single ``email = %s OR username = %s``
+    query on the normalized identifier (both columns are stored lowercase
+    and carry unique indexes) and the password hasher runs
+    exactly once per attempt, on ``hash_pool``. Unknown identifiers are hashed
+    as a throwaway password so a miss costs the same as a wrong password.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        user = self.get_user_by_identifier(username)
+        if user is None:
+            # Run the default password hasher once to reduce the timing
+            # difference between an existing and a nonexistent user.
+            hash_pool.make_password(password)
+            return None
+
+        if hash_pool.check_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    def get_user_by_identifier(self, identifier):
+        """Return the user whose email or username matches ``identifier``."""
+        identifier = normalize_identifier(identifier)
+        candidates = list(
+            UserModel._default_manager.filter(
+                Q(email=identifier) | Q(username=identifier)
+            )[:2]
+        )
+        # A username may look like someone else's email; the email wins.
+        for user in candidates:
+            if user.email == identifier:
+                return user
+        return candidates[0] if candidates else None
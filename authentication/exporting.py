@@ -0,0 +1,84 @@
+"""
+Streaming export of users as CSV or NDJSON.
+
+Rows are fetched with keyset pagination (``id > last_id ORDER BY id LIMIT
+n``), so each query is an index range scan no matter how deep the export
+is, and only one page of tuples is held at a time. Pages are encoded and
+yielded as one chunk each, which suits both ``StreamingHttpResponse`` and
+writing to a file.
+
+The columns are ``UserProfileSerializer.Meta.fields`` and values are
+formatted by that serializer's own fields, so the export matches the
+profile API.
+"""
+
+import csv
+import io
+import json
+
+from .models import User
+from .serializers import UserProfileSerializer
+
+FIELDS = tuple(UserProfileSerializer.Meta.fields)
+BATCH_SIZE = 2000
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def iter_pages(queryset=None, batch_size=None):
+    """Yield lists of value tuples for ``FIELDS``, ordered by id."""
+    queryset = User.objects.all() if queryset is None else queryset
+    batch_size = batch_size or BATCH_SIZE
+    pk_index = FIELDS.index('id')
+    last_id = None
+    while True:
+        page = queryset.order_by('id').values_list(*FIELDS)
+        if last_id is not None:
+            page = page.filter(id__gt=last_id)
+        rows = list(page[:batch_size])
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][pk_index]
+
+
+def iter_records(queryset=None, batch_size=None):
+    """Yield pages of ``{field: representation}`` dicts."""
+    serializer_fields = UserProfileSerializer().fields
+    formatters = [serializer_fields[name].to_representation for name in FIELDS]
+    for rows in iter_pages(queryset, batch_size):
+        yield [
+            {
+                name: None if value is None else formatter(value)
+                for name, formatter, value in zip(FIELDS, formatters, row)
+            }
+            for row in rows
+        ]
+
+
+def stream_csv(queryset=None, batch_size=None):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=FIELDS)
+    writer.writeheader()
+    for records in iter_records(queryset, batch_size):
+        writer.writerows(records)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def stream_ndjson(queryset=None, batch_size=None):
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    for records in iter_records(queryset, batch_size):
+        yield ''.join(encoder.encode(record) + '\n' for record in records)
+
+
+STREAMERS = {
+    'csv': stream_csv,
+    'ndjson': stream_ndjson,
+}
@@ -0,0 +1,181 @@
+"""
+Bounded worker pool for password hashing and verification.
+
+Hashing runs on a small thread pool (hashlib's PBKDF2/scrypt, argon2-cffi and
+bcrypt all release the GIL, so threads hash in parallel) with a hard cap on
+work in flight. When every worker is busy and the queue is full, callers get
+``PasswordHashingBusy`` (HTTP 503 with ``Retry-After``) right away instead of
+queueing behind a credential-stuffing burst.
+
+The pool bounds how many hashes run at once; it does not free the caller.
+A sync view's request thread still blocks on the result. Only the async
+views, which await the future, keep serving other requests meanwhile.
+Queue depth, in-flight and rejected counts and hash latency are served with
+the request metrics at ``metrics/``.
+
+Workers only see strings; anything touching the database (saving an
+upgraded hash, for instance) happens back on the calling thread.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions, status
+
+from . import metrics
+
+DEFAULTS = {
+    'WORKERS': 4,
+    'MAX_PENDING': 32,
+    'RETRY_AFTER': 1,
+}
+
+
+class PasswordHashingBusy(exceptions.APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _('The server is busy, please retry shortly.')
+    default_code = 'hashing_busy'
+
+    def __init__(self, wait, detail=None, code=None):
+        # DRF's exception handler turns ``wait`` into a Retry-After header.
+        self.wait = wait
+        super().__init__(detail, code)
+
+
+class HashPool:
+    def __init__(self, options=None):
+        self.options = {**DEFAULTS, **(options or {})}
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(
+            self.options['WORKERS'] + self.options['MAX_PENDING']
+        )
+        self._lock = threading.Lock()
+        self.reset_metrics()
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.options['WORKERS'],
+                        thread_name_prefix='password-hash',
+                    )
+        return self._executor
+
+    def reset_metrics(self):
+        with self._lock:
+            self.counters = {
+                'submitted': 0,
+                'rejected': 0,
+                'completed': 0,
+                'in_flight': 0,
+                'wait_seconds_total': 0.0,
+                'hash_seconds_total': 0.0,
+                'hash_seconds_max': 0.0,
+            }
+
+    def _record(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                self.counters[name] += delta
+
+    def submit(self, func, *args):
+        """Queue ``func(*args)`` and return its future, or raise if full."""
+        if not self._slots.acquire(blocking=False):
+            self._record(rejected=1)
+            raise PasswordHashingBusy(self.options['RETRY_AFTER'])
+
+        queued_at = time.perf_counter()
+        self._record(submitted=1, in_flight=1)
+        # The worker has its own context; charge the hash to this request
+        request_metrics = metrics.current()
+
+        def run():
+            started_at = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                elapsed = time.perf_counter() - started_at
+                if request_metrics is not None:
+                    request_metrics.hash_seconds += elapsed
+                with self._lock:
+                    self.counters['wait_seconds_total'] += started_at - queued_at
+                    self.counters['hash_seconds_total'] += elapsed
+                    self.counters['hash_seconds_max'] = max(self.counters['hash_seconds_max'], elapsed)
+
+        try:
+            future = self.executor.submit(run)
+        except BaseException:
+            self._record(in_flight=-1)
+            self._slots.release()
+            raise
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        self._record(in_flight=-1, completed=1)
+        self._slots.release()
+
+    def run(self, func, *args):
+        """Run ``func(*args)`` on the pool and wait for the result."""
+        return self.submit(func, *args).result()
+
+    # Password helpers ---------------------------------------------------
+
+    def make_password(self, raw_password):
+        return self.run(hashers.make_password, raw_password)
+
+    def check_password(self, user, raw_password):
+        """
+        Verify ``raw_password`` against ``user.password`` off-thread.
+
+        Mirrors ``AbstractBaseUser.check_password``: a correct password
+        stored under an outdated policy is rehashed and saved.
+        """
+        is_correct, must_update = self.run(verify_password, raw_password, user.password)
+        if is_correct and must_update:
+            user.password = self.make_password(raw_password)
+            user.save(update_fields=['password'])
+        return is_correct
+
+    def stats(self):
+        with self._lock:
+            data = dict(self.counters)
+        data['workers'] = self.options['WORKERS']
+        data['max_pending'] = self.options['MAX_PENDING']
+        data['queue_depth'] = max(0, data['in_flight'] - data['workers'])
+        return data
+
+    def collect(self):
+        """``stats()`` as families for ``metrics.registry.add_collector``."""
+        data = self.stats()
+        return [
+            (f'password_hash_{name}', kind, help_text, [({}, data[key])])
+            for name, key, kind, help_text in (
+                ('workers', 'workers', 'gauge', 'Hash pool worker threads.'),
+                ('in_flight', 'in_flight', 'gauge', 'Hashes running or queued.'),
+                ('queue_depth', 'queue_depth', 'gauge', 'Hashes waiting for a worker.'),
+                ('submitted_total', 'submitted', 'counter', 'Hashes accepted by the pool.'),
+                ('rejected_total', 'rejected', 'counter', 'Hashes refused with a 503 because the pool was full.'),
+                ('completed_total', 'completed', 'counter', 'Hashes finished.'),
+                ('wait_seconds_total', 'wait_seconds_total', 'counter', 'Time hashes spent queued.'),
+                ('seconds_total', 'hash_seconds_total', 'counter', 'Time spent hashing.'),
+                ('seconds_max', 'hash_seconds_max', 'gauge', 'Slowest hash since the last reset.'),
+            )
+        ]
+
+
+def verify_password(raw_password, encoded):
+    """Return ``(is_correct, must_update)``; safe to run on a worker."""
+    updates = []
+    is_correct = hashers.check_password(raw_password, encoded, setter=updates.append)
+    return is_correct, bool(updates)
+
+
+hash_pool = HashPool(getattr(settings, 'PASSWORD_HASH_POOL', None))
+metrics.registry.add_collector(hash_pool.collect)
@@ -0,0 +1,189 @@
+"""
+Password hashers whose work factors come from ``settings.PASSWORD_HASHING``.
+
+The algorithm names match Django's built-in hashers, so existing hashes keep
+verifying. argon2 and bcrypt need ``argon2-cffi`` and ``bcrypt``; the
+``check_password_hasher`` system check refuses to start when the selected
+algorithm's library is missing, since every login would fail. Because ``must_update()`` compares a stored hash against the
+current settings, changing a work factor makes Django rehash the password on
+the user's next successful login (one ``UPDATE ... SET password``); logins
+whose hash already matches the policy do not write anything.
+"""
+
+import base64
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    BasePasswordHasher,
+    BCryptSHA256PasswordHasher,
+    PBKDF2PasswordHasher,
+    get_hasher,
+    mask_hash,
+)
+from django.core import checks
+from django.utils.crypto import constant_time_compare
+from django.utils.translation import gettext_noop as _
+
+DEFAULTS = {
+    'PBKDF2_ITERATIONS': PBKDF2PasswordHasher.iterations,
+    'ARGON2_TIME_COST': Argon2PasswordHasher.time_cost,
+    'ARGON2_MEMORY_COST': Argon2PasswordHasher.memory_cost,
+    'ARGON2_PARALLELISM': Argon2PasswordHasher.parallelism,
+    'BCRYPT_ROUNDS': BCryptSHA256PasswordHasher.rounds,
+    'SCRYPT_WORK_FACTOR': 2 ** 14,
+    'SCRYPT_BLOCK_SIZE': 8,
+    'SCRYPT_PARALLELISM': 1,
+}
+
+
+def hashing_policy(name):
+    """Return a work-factor setting, falling back to Django's defaults."""
+    return getattr(settings, 'PASSWORD_HASHING', {}).get(name, DEFAULTS[name])
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return hashing_policy('PBKDF2_ITERATIONS')
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return hashing_policy('ARGON2_TIME_COST')
+
+    @property
+    def memory_cost(self):
+        return hashing_policy('ARGON2_MEMORY_COST')
+
+    @property
+    def parallelism(self):
+        return hashing_policy('ARGON2_PARALLELISM')
+
+
+class TunedBCryptSHA256PasswordHasher(BCryptSHA256PasswordHasher):
+    @property
+    def rounds(self):
+        return hashing_policy('BCRYPT_ROUNDS')
+
+
+class ScryptPasswordHasher(BasePasswordHasher):
+    """
+    Secure password hashing using the scrypt algorithm from hashlib.
+
+    Django only ships an scrypt hasher from 4.0 on; this one uses the same
+    ``scrypt$n$salt$r$p$hash`` format so hashes survive an upgrade.
+    """
+    algorithm = 'scrypt'
+
+    @property
+    def work_factor(self):
+        return hashing_policy('SCRYPT_WORK_FACTOR')
+
+    @property
+    def block_size(self):
+        return hashing_policy('SCRYPT_BLOCK_SIZE')
+
+    @property
+    def parallelism(self):
+        return hashing_policy('SCRYPT_PARALLELISM')
+
+    def encode(self, password, salt, n=None, r=None, p=None):
+        assert password is not None
+        assert salt and '$' not in salt
+        n = n or self.work_factor
+        r = r or self.block_size
+        p = p or self.parallelism
+        hash_ = hashlib.scrypt(
+            password.encode(),
+            salt=salt.encode(),
+            n=n,
+            r=r,
+            p=p,
+            # scrypt needs 128 * n * r bytes; leave headroom over that.
+            maxmem=256 * n * r * p,
+            dklen=64,
+        )
+        hash_ = base64.b64encode(hash_).decode('ascii').strip()
+        return '%s$%d$%s$%d$%d$%s' % (self.algorithm, n, salt, r, p, hash_)
+
+    def decode(self, encoded):
+        algorithm, work_factor, salt, block_size, parallelism, hash_ = encoded.split('$', 6)
+        assert algorithm == self.algorithm
+        return {
+            'algorithm': algorithm,
+            'work_factor': int(work_factor),
+            'salt': salt,
+            'block_size': int(block_size),
+            'parallelism': int(parallelism),
+            'hash': hash_,
+        }
+
+    def verify(self, password, encoded):
+        decoded = self.decode(encoded)
+        encoded_2 = self.encode(
+            password,
+            decoded['salt'],
+            decoded['work_factor'],
+            decoded['block_size'],
+            decoded['parallelism'],
+        )
+        return constant_time_compare(encoded, encoded_2)
+
+    def safe_summary(self, encoded):
+        decoded = self.decode(encoded)
+        return {
+            _('algorithm'): decoded['algorithm'],
+            _('work factor'): decoded['work_factor'],
+            _('block size'): decoded['block_size'],
+            _('parallelism'): decoded['parallelism'],
+            _('salt'): mask_hash(decoded['salt']),
+            _('hash'): mask_hash(decoded['hash']),
+        }
+
+    def must_update(self, encoded):
+        decoded = self.decode(encoded)
+        return (
+            decoded['work_factor'] != self.work_factor or
+            decoded['block_size'] != self.block_size or
+            decoded['parallelism'] != self.parallelism
+        )
+
+    def harden_runtime(self, password, encoded):
+        # The runtime of scrypt depends on both n and r; there is no cheap
+        # way to make up the difference.
+        pass
+
+
+# Hashers selectable through PASSWORD_HASHING['ALGORITHM'].
+POLICY_HASHERS = {
+    'pbkdf2': TunedPBKDF2PasswordHasher,
+    'argon2': TunedArgon2PasswordHasher,
+    'bcrypt': TunedBCryptSHA256PasswordHasher,
+    'scrypt': ScryptPasswordHasher,
+}
+
+# pip packages providing the libraries of the optional algorithms
+HASHER_PACKAGES = {
+    'argon2': 'argon2-cffi',
+    'bcrypt_sha256': 'bcrypt',
+}
+
+
+def check_password_hasher(app_configs, **kwargs):
+    """Fail when the library of the default password hasher cannot be loaded."""
+    hasher = get_hasher()
+    if not hasher.library:
+        return []
+    try:
+        hasher._load_library()
+    except ValueError:
+        return [checks.Error(
+            f'The {hasher.algorithm!r} password hasher cannot load its library.',
+            hint=f'pip install {HASHER_PACKAGES.get(hasher.algorithm, hasher.algorithm)}, '
+                 'or pick another PASSWORD_HASHER.',
+            id='authentication.E001',
+        )]
+    return []
@@ -0,0 +1,226 @@
+"""
+Streaming bulk import of user accounts (``manage.py import_users``).
+
+Rows are read lazily from CSV or JSON Lines and processed in fixed-size
+batches, so memory depends on the batch size rather than the file size.
+
+Validation reuses the fields of one ``UserRegistrationSerializer`` instance,
+so rows obey exactly the registration rules, minus the per-row uniqueness
+queries: username and email uniqueness is checked with one query per batch
+(earlier batches are already committed, so duplicates across the file are
+caught too) plus a set for duplicates inside the batch.
+
+Each batch is written with ``bulk_create`` for users, tokens and the
+profile-sync outbox in one transaction. ``bulk_create`` skips ``save()`` and
+signals, so the outbox rows, search trigrams and availability index are
+handled here.
+Passwords are hashed on a thread pool (the hashers release the GIL), or
+taken as-is from a ``password_hash`` column.
+"""
+
+import csv
+import io
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+from rest_framework.authtoken.models import Token
+from rest_framework.fields import SkipField, empty
+from rest_framework.validators import UniqueValidator
+
+from .availability import availability_index
+from .models import User, UserSyncOutbox, normalize_identifier
+from .search import search_index
+from .serializers import UserRegistrationSerializer
+
+
+def read_rows(stream, fmt):
+    """Yield ``(line_number, row)`` pairs from a CSV or JSONL text stream."""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            # Empty cells mean "not provided", as an absent JSON key would.
+            yield reader.line_num, {key: value for key, value in row.items() if value not in ('', None)}
+    else:
+        for line_number, line in enumerate(stream, 1):
+            if line.strip():
+                try:
+                    yield line_number, json.loads(line)
+                except ValueError as e:
+                    yield line_number, e
+
+
+class UserRowValidator:
+    """Apply ``UserRegistrationSerializer``'s rules to plain dicts."""
+
+    def __init__(self):
+        self.fields = {}
+        for name, field in UserRegistrationSerializer().fields.items():
+            if field.read_only:
+                continue
+            # Uniqueness is checked per batch by UserImporter.
+            field.validators = [v for v in field.validators if not isinstance(v, UniqueValidator)]
+            self.fields[name] = field
+
+    def validate(self, row):
+        """Return ``(data, errors)``; ``data`` is ``None`` when invalid."""
+        if not isinstance(row, dict):
+            return None, {'non_field_errors': [f'Invalid row: {row}']}
+
+        password_hash = row.get('password_hash')
+        if password_hash:
+            try:
+                identify_hasher(password_hash)
+            except ValueError:
+                return None, {'password_hash': ['Unknown password hash format.']}
+
+        data, errors = {}, {}
+        for name, field in self.fields.items():
+            if password_hash and name in ('password', 'password_confirm'):
+                continue
+            value = row.get(name, empty)
+            if name == 'password_confirm' and value is empty:
+                # Imports usually carry a single password column.
+                value = row.get('password', empty)
+            try:
+                data[name] = field.run_validation(value)
+            except SkipField:
+                pass
+            except serializers.ValidationError as e:
+                errors[name] = e.detail
+        if errors:
+            return None, errors
+
+        if password_hash:
+            data['password_hash'] = password_hash
+        elif data['password'] != data['password_confirm']:
+            return None, {'non_field_errors': ["Passwords don't match"]}
+        data.pop('password_confirm', None)
+        # bulk_create skips User.save(), which normally does this
+        data['email'] = normalize_identifier(data['email'])
+        data['username'] = User.normalize_username(data['username'])
+        return data, None
+
+
+class UserImporter:
+    def __init__(self, batch_size=1000, workers=None, dry_run=False, on_reject=None):
+        self.batch_size = batch_size
+        self.workers = workers
+        self.dry_run = dry_run
+        self.on_reject = on_reject or (lambda line_number, errors: None)
+        self.validator = UserRowValidator()
+        self.counters = {'rows': 0, 'created': 0, 'rejected': 0, 'batches': 0}
+        self.elapsed = 0.0
+
+    def run(self, rows):
+        """Import ``(line_number, row)`` pairs; return the counters."""
+        start = time.perf_counter()
+        with ThreadPoolExecutor(self.workers) as executor:
+            batch = []
+            for line_number, row in rows:
+                self.counters['rows'] += 1
+                data, errors = self.validator.validate(row)
+                if errors:
+                    self.reject(line_number, errors)
+                    continue
+                batch.append((line_number, data))
+                if len(batch) >= self.batch_size:
+                    self.import_batch(batch, executor)
+                    batch = []
+            if batch:
+                self.import_batch(batch, executor)
+        self.elapsed = time.perf_counter() - start
+        return self.counters
+
+    @property
+    def rows_per_second(self):
+        return self.counters['rows'] / self.elapsed if self.elapsed else 0.0
+
+    def reject(self, line_number, errors):
+        self.counters['rejected'] += 1
+        self.on_reject(line_number, errors)
+
+    def import_batch(self, batch, executor):
+        batch = self.drop_duplicates(batch)
+        if not batch or self.dry_run:
+            return
+
+        passwords = [data.pop('password', None) for _, data in batch]
+        to_hash = [password for password in passwords if password is not None]
+        hashes = iter(executor.map(make_password, to_hash))
+        users = []
+        for (_, data), password in zip(batch, passwords):
+            password_hash = data.pop('password_hash', None)
+            users.append(User(password=password_hash or next(hashes), **data))
+
+        try:
+            with transaction.atomic():
+                self.insert(users)
+        except IntegrityError:
+            # Lost a race with a concurrent registration; fall back to
+            # inserting row by row so only the conflicting rows fail.
+            for (line_number, _), user in zip(batch, users):
+                user.pk = None
+                try:
+                    with transaction.atomic():
+                        self.insert([user])
+                except IntegrityError as e:
+                    self.reject(line_number, {'non_field_errors': [str(e)]})
+        self.counters['batches'] += 1
+
+    def drop_duplicates(self, batch):
+        """Reject rows whose username or email is taken or repeated."""
+        usernames = [data['username'] for _, data in batch]
+        emails = [data['email'] for _, data in batch]
+        taken_usernames = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        taken_emails = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+
+        unique = []
+        for line_number, data in batch:
+            errors = {}
+            if data['username'] in taken_usernames:
+                errors['username'] = ['A user with that username already exists.']
+            if data['email'] in taken_emails:
+                errors['email'] = ['user with this email already exists.']
+            if errors:
+                self.reject(line_number, errors)
+                continue
+            taken_usernames.add(data['username'])
+            taken_emails.add(data['email'])
+            unique.append((line_number, data))
+        return unique
+
+    def insert(self, users):
+        User.objects.bulk_create(users)
+        if any(user.pk is None for user in users):
+            # Backends that can't return ids from a bulk insert (MySQL)
+            ids = dict(
+                User.objects.filter(username__in=[user.username for user in users])
+                .values_list('username', 'id')
+            )
+            for user in users:
+                user.pk = ids[user.username]
+
+        Token.objects.bulk_create([Token(key=Token.generate_key(), user=user) for user in users])
+        UserSyncOutbox.objects.bulk_create([
+            UserSyncOutbox(user_id=user.pk, operation=UserSyncOutbox.UPSERT) for user in users
+        ])
+        search_index.index_users(users, replace=False)
+        transaction.on_commit(lambda: self.index(users))
+        self.counters['created'] += len(users)
+
+    @staticmethod
+    def index(users):
+        for user in users:
+            availability_index.add(user.email, user.username)
+
+
+def open_text(path):
+    """Open ``path`` for reading as text; ``-`` means stdin."""
+    if path == '-':
+        return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', newline='')
+    return open(path, encoding='utf-8', newline='')
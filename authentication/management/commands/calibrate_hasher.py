@@ -0,0 +1,97 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from authentication.hashers import POLICY_HASHERS, hashing_policy
+
+# Candidate work factors for each algorithm, cheapest first.
+CANDIDATES = {
+    'argon2': ('ARGON2_TIME_COST', range(1, 17)),
+    'bcrypt': ('BCRYPT_ROUNDS', range(4, 18)),
+    'scrypt': ('SCRYPT_WORK_FACTOR', [2 ** k for k in range(10, 21)]),
+}
+
+
+class Command(BaseCommand):
+    help = 'Measure password hashing time on this host and recommend work factors'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--algorithm', choices=sorted(POLICY_HASHERS),
+            default=settings.PASSWORD_HASHING['ALGORITHM'],
+            help='Algorithm to calibrate (default: the configured one)'
+        )
+        parser.add_argument(
+            '--target-ms', type=float, default=100.0,
+            help='Latency budget for a single hash in milliseconds'
+        )
+        parser.add_argument(
+            '--samples', type=int, default=3,
+            help='Hashes to time per candidate; the median is used'
+        )
+
+    def handle(self, *args, **options):
+        algorithm = options['algorithm']
+        target = options['target_ms']
+        self.samples = options['samples']
+        self.hasher = POLICY_HASHERS[algorithm]()
+
+        try:
+            if algorithm == 'pbkdf2':
+                name, value, elapsed = self.calibrate_pbkdf2(target)
+            else:
+                name, value, elapsed = self.calibrate_stepwise(algorithm, target)
+        except ValueError as e:
+            # Raised by Django when the algorithm's library isn't installed.
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Recommended {algorithm} setting for a {target:.0f} ms budget:\n'
+                f'PASSWORD_HASHER={algorithm}\n'
+                f'{name}={value}\n'
+                f'Measured hash time: {elapsed:.1f} ms '
+                f'(currently configured: {name}={hashing_policy(name)})'
+            )
+        )
+
+    def time_hash(self, name, value):
+        """Median milliseconds to hash a password with ``name`` set to ``value``."""
+        policy = {**settings.PASSWORD_HASHING, name: value}
+        timings = []
+        with override_settings(PASSWORD_HASHING=policy):
+            for _ in range(self.samples):
+                salt = self.hasher.salt()
+                start = time.perf_counter()
+                self.hasher.encode('calibration-password', salt)
+                timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+
+    def calibrate_pbkdf2(self, target):
+        # PBKDF2 cost is linear in the iteration count, so extrapolate from
+        # a probe and then confirm.
+        name, probe = 'PBKDF2_ITERATIONS', 50000
+        per_iteration = self.time_hash(name, probe) / probe
+        iterations = max(10000, int(target / per_iteration) // 10000 * 10000)
+        self.stdout.write(f'{name}={probe}: {per_iteration * probe:.1f} ms')
+        return name, iterations, self.time_hash(name, iterations)
+
+    def calibrate_stepwise(self, algorithm, target):
+        # Work factors are coarse (often logarithmic), so take the largest
+        # one that still fits the budget.
+        name, candidates = CANDIDATES[algorithm]
+        best = None
+        for value in candidates:
+            elapsed = self.time_hash(name, value)
+            self.stdout.write(f'{name}={value}: {elapsed:.1f} ms')
+            if elapsed > target:
+                break
+            best = (name, value, elapsed)
+        if best is None:
+            raise CommandError(
+                f'Even the cheapest {algorithm} setting exceeds {target:.0f} ms on this host'
+            )
+        return best
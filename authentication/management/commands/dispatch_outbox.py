@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from authentication.outbox import outbox_dispatcher
+
+
+class Command(BaseCommand):
+    help = 'Apply pending user changes from the outbox to the MongoDB UserProfile collection'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep polling for new outbox rows instead of exiting once drained',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Seconds to sleep between polls when the outbox is empty (default: 1)',
+        )
+        parser.add_argument(
+            '--batch-size', type=int,
+            help='Rows per bulk write (default: USER_PROFILE_SYNC["BATCH_SIZE"])',
+        )
+
+    def handle(self, *args, **options):
+        dispatcher = outbox_dispatcher()
+        if options['batch_size']:
+            dispatcher.options['BATCH_SIZE'] = options['batch_size']
+
+        if options['loop']:
+            try:
+                dispatcher.run_forever(options['interval'])
+            except KeyboardInterrupt:
+                pass
+        else:
+            dispatcher.drain()
+
+        stats = dispatcher.stats()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Dispatched {stats['dispatched']} outbox rows in {stats['batches']} batches "
+                f"({stats['failed_batches']} failed)\n"
+                f"Pending: {stats['pending']}, oldest pending: {stats['oldest_pending_seconds']:.1f}s"
+            )
+        )
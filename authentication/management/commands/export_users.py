@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from authentication.exporting import BATCH_SIZE, STREAMERS
+
+
+class Command(BaseCommand):
+    help = 'Stream all users to a CSV or NDJSON file using the profile API fields'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-', help='Output file (default: stdout)')
+        parser.add_argument('--output', choices=list(STREAMERS), default='csv', help='Output format (default: csv)')
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help=f'Rows fetched per query (default: {BATCH_SIZE})',
+        )
+
+    def handle(self, *args, **options):
+        chunks = STREAMERS[options['output']](batch_size=options['batch_size'])
+        if options['path'] == '-':
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+
+        with open(options['path'], 'w', encoding='utf-8', newline='') as f:
+            for chunk in chunks:
+                f.write(chunk)
+        self.stdout.write(self.style.SUCCESS(f"Exported users to {options['path']}"))
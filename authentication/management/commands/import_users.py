@@ -0,0 +1,59 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from authentication.importing import UserImporter, open_text, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Import users from a CSV or JSON Lines file, validated with the registration rules. '
+        'Rows may carry a plain "password" or an already hashed "password_hash".'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Input file, or - for stdin')
+        parser.add_argument(
+            '--format', choices=['csv', 'jsonl'],
+            help='Input format (default: from the file extension, csv for stdin)',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='Users per INSERT (default: 1000)')
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Threads hashing passwords (default: number of CPUs)',
+        )
+        parser.add_argument('--rejects', help='Write rejected rows and their errors here as JSON Lines')
+        parser.add_argument('--dry-run', action='store_true', help='Validate only; write nothing')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        rejects = open(options['rejects'], 'w', encoding='utf-8') if options['rejects'] else None
+
+        def on_reject(line_number, errors):
+            if rejects:
+                rejects.write(json.dumps({'line': line_number, 'errors': errors}) + '\n')
+            elif options['verbosity'] > 1:
+                self.stderr.write(f'line {line_number}: {json.dumps(errors)}')
+
+        importer = UserImporter(
+            batch_size=options['batch_size'], workers=options['workers'],
+            dry_run=options['dry_run'], on_reject=on_reject,
+        )
+        try:
+            with open_text(path) as stream:
+                counters = importer.run(read_rows(stream, fmt))
+        except OSError as e:
+            raise CommandError(e)
+        finally:
+            if rejects:
+                rejects.close()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{'Validated' if options['dry_run'] else 'Imported'} {counters['rows']} rows "
+                f"in {importer.elapsed:.1f}s ({importer.rows_per_second:.0f} rows/s)\n"
+                f"Created: {counters['created']}, rejected: {counters['rejected']}"
+            )
+        )
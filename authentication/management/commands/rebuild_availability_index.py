@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from authentication.availability import availability_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the email/username availability index and publish it to the shared cache'
+
+    def handle(self, *args, **options):
+        availability_index.build()
+        metrics = availability_index.metrics()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Availability index rebuilt (highest user id: {availability_index.high_water})\n'
+                f"Email filter: {metrics['email_bits']} bits, "
+                f"estimated false-positive rate {metrics['email_estimated_false_positive_rate']:.4%}\n"
+                f"Username filter: {metrics['username_bits']} bits, "
+                f"estimated false-positive rate {metrics['username_estimated_false_positive_rate']:.4%}"
+            )
+        )
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from authentication.search import search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the trigram search index over user names, usernames and emails'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='Users indexed per batch (default: 2000)')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        total = search_index.rebuild(batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            self.style.SUCCESS(f'Search index rebuilt for {total} users in {elapsed:.1f}s')
+        )
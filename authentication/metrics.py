@@ -0,0 +1,327 @@
+"""
+Per-view request metrics, Server-Timing headers and SQL query budgets.
+
+``MetricsMiddleware`` gives every request a ``RequestMetrics`` (held in a
+context variable, so it follows the request into ``sync_to_async`` threads
+and hash pool workers) that collects:
+
+* SQL statements and their time, through an execute wrapper installed on
+  every database connection (BEGIN/COMMIT/SAVEPOINT are timed but not
+  counted, as in the tests);
+* password hashing time on ``hash_pool``;
+* serialization time (``UserProfileSerializer`` and JSON rendering).
+
+When the response is ready the totals and the latency are added to the
+process-wide ``registry`` under the view name (``authentication:login``),
+exposed in Prometheus text format at ``metrics/``, and sent back as a
+``Server-Timing`` header.
+
+``QUERY_BUDGETS`` maps view names to the most queries they may run. A
+request over budget is logged, or with ``BUDGET_ACTION = 'raise'`` fails
+with ``QueryBudgetExceeded``, which the test client re-raises.
+
+Other modules add their own gauges and counters to the scrape with
+``registry.add_collector``.
+
+The registry is per process; scrape every worker, or sum in Prometheus.
+"""
+
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    'SERVER_TIMING': True,
+    # {'authentication:login': 4, ...}
+    'QUERY_BUDGETS': {},
+    # 'log' or 'raise'
+    'BUDGET_ACTION': 'log',
+    # Latency histogram buckets, in seconds
+    'BUCKETS': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+    # Lets non-staff scrapers in with "Authorization: Bearer <token>"
+    'SCRAPE_TOKEN': None,
+}
+
+TRANSACTION_CONTROL = frozenset({'BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE'})
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'db_seconds', 'hash_seconds', 'serialize_seconds')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.hash_seconds = 0.0
+        self.serialize_seconds = 0.0
+
+
+def current():
+    """The metrics of the request being handled, or ``None``."""
+    return _current.get()
+
+
+@contextmanager
+def not_counted():
+    """Leave the block's queries and timings out of the current request."""
+    token = _current.set(None)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def timing(field):
+    """Add the time spent in the block to the current request's ``field``."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        setattr(metrics, field, getattr(metrics, field) + time.perf_counter() - start)
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_seconds += time.perf_counter() - start
+        if sql.split(None, 1)[0].upper() not in TRANSACTION_CONTROL:
+            metrics.queries += 1
+
+
+def install_query_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_recorder)
+
+
+class MetricsRegistry:
+    """Thread-safe per-view totals and latency histograms."""
+
+    COUNTERS = ('requests', 'queries', 'db_seconds', 'hash_seconds', 'serialize_seconds', 'budget_exceeded')
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.collectors = []
+        self._lock = threading.Lock()
+        self.reset()
+
+    def add_collector(self, collect):
+        """
+        Include ``collect()`` in ``render()``. It returns
+        ``(name, type, help, samples)`` families, with samples as
+        ``(labels dict, value)`` pairs.
+        """
+        self.collectors.append(collect)
+
+    def reset(self):
+        with self._lock:
+            self._views = {}
+
+    def observe(self, view, metrics, latency, over_budget=False):
+        with self._lock:
+            entry = self._views.get(view)
+            if entry is None:
+                entry = self._views[view] = {
+                    **dict.fromkeys(self.COUNTERS, 0),
+                    'latency_seconds': 0.0,
+                    'latency_buckets': [0] * len(self.buckets),
+                }
+            entry['requests'] += 1
+            entry['queries'] += metrics.queries
+            entry['db_seconds'] += metrics.db_seconds
+            entry['hash_seconds'] += metrics.hash_seconds
+            entry['serialize_seconds'] += metrics.serialize_seconds
+            entry['budget_exceeded'] += over_budget
+            entry['latency_seconds'] += latency
+            for i, bound in enumerate(self.buckets):
+                if latency <= bound:
+                    entry['latency_buckets'][i] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                view: {**entry, 'latency_buckets': list(entry['latency_buckets'])}
+                for view, entry in self._views.items()
+            }
+
+    def render(self):
+        """The registry in the Prometheus text exposition format."""
+        views = sorted(self.snapshot().items())
+        lines = [
+            '# HELP http_request_duration_seconds Request latency by view.',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        for view, entry in views:
+            label = 'view="%s"' % escape_label(view)
+            for bound, count in zip(self.buckets, entry['latency_buckets']):
+                lines.append(f'http_request_duration_seconds_bucket{{{label},le="{bound}"}} {count}')
+            lines.append(f'http_request_duration_seconds_bucket{{{label},le="+Inf"}} {entry["requests"]}')
+            lines.append(f'http_request_duration_seconds_sum{{{label}}} {entry["latency_seconds"]}')
+            lines.append(f'http_request_duration_seconds_count{{{label}}} {entry["requests"]}')
+
+        for name, key, help_text in (
+            ('view_db_queries_total', 'queries', 'SQL statements run.'),
+            ('view_db_seconds_total', 'db_seconds', 'Time spent in SQL statements.'),
+            ('view_password_hash_seconds_total', 'hash_seconds', 'Time spent hashing passwords.'),
+            ('view_serialize_seconds_total', 'serialize_seconds', 'Time spent serializing responses.'),
+            ('view_query_budget_exceeded_total', 'budget_exceeded', 'Requests over their query budget.'),
+        ):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for view, entry in views:
+                lines.append(f'{name}{{view="{escape_label(view)}"}} {entry[key]}')
+
+        for collect in self.collectors:
+            for name, kind, help_text, samples in collect():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                for labels, value in samples:
+                    label = ','.join(f'{key}="{escape_label(str(val))}"' for key, val in labels.items())
+                    lines.append(f'{name}{{{label}}} {value}' if label else f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def options():
+    return {**DEFAULTS, **getattr(settings, 'METRICS', {})}
+
+
+registry = MetricsRegistry(options()['BUCKETS'])
+
+
+def reset_registry(setting, **kwargs):
+    if setting == 'METRICS':
+        registry.buckets = tuple(options()['BUCKETS'])
+        registry.reset()
+
+
+setting_changed.connect(reset_registry)
+
+
+class MetricsMiddleware:
+    """
+    Collect ``RequestMetrics`` for each request and record them per view.
+
+    Place it first in ``MIDDLEWARE`` so the latency covers the other
+    middleware too. It runs natively under both WSGI and ASGI; the context
+    variable follows async requests into ``sync_to_async`` threads.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # As MiddlewareMixin does: lets the handler await __call__
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        config = options()
+        if not config['ENABLED']:
+            return self.get_response(request)
+
+        metrics = self.start()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - start, config)
+
+    async def __acall__(self, request):
+        config = options()
+        if not config['ENABLED']:
+            return await self.get_response(request)
+
+        metrics = self.start()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - start, config)
+
+    def start(self):
+        # Connections opened before this module was imported
+        for connection in connections.all():
+            install_query_recorder(connection)
+        return RequestMetrics()
+
+    def finish(self, request, response, metrics, latency, config):
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name if match else None) or 'unmatched'
+        budget = config['QUERY_BUDGETS'].get(view)
+        over_budget = budget is not None and metrics.queries > budget
+        registry.observe(view, metrics, latency, over_budget)
+
+        if config['SERVER_TIMING']:
+            response['Server-Timing'] = server_timing(metrics, latency)
+        if over_budget:
+            message = f'{view} ran {metrics.queries} SQL queries; its budget is {budget}'
+            if config['BUDGET_ACTION'] == 'raise':
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+
+def server_timing(metrics, latency):
+    return (
+        f'db;dur={metrics.db_seconds * 1000:.2f};desc="{metrics.queries} queries", '
+        f'hash;dur={metrics.hash_seconds * 1000:.2f}, '
+        f'serialize;dur={metrics.serialize_seconds * 1000:.2f}, '
+        f'total;dur={latency * 1000:.2f}'
+    )
+
+
+def scrape_allowed(request):
+    """Whether ``request`` comes from a staff session or carries the scrape token."""
+    token = options()['SCRAPE_TOKEN']
+    auth = request.META.get('HTTP_AUTHORIZATION', '').split()
+    return bool(
+        (token and len(auth) == 2 and auth[0].lower() == 'bearer' and constant_time_compare(auth[1], token))
+        or request.user.is_staff
+    )
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint, for staff or the configured scrape token."""
+    if not scrape_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
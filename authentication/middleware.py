@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+from django.conf import settings
+
+REFRESHED_AT_KEY = '_session_refreshed_at'
+
+
+class SlidingSessionMiddleware:
+    """
+    Extend sessions only when they are close to expiring.
+
+    With ``SESSION_SAVE_EVERY_REQUEST`` off, a session is written when its
+    data changes. This middleware additionally rewrites it (pushing the
+    expiry forward) once less than ``SESSION_REFRESH_THRESHOLD`` seconds of
+    its ``SESSION_COOKIE_AGE`` remain, so active users stay logged in while
+    ordinary reads cause no writes. Requests that never touched the session,
+    such as token-authenticated API calls, are left alone.
+
+    Must come after SessionMiddleware in ``MIDDLEWARE``. Works natively in
+    both sync and async stacks, so ASGI requests are not adapted through a
+    thread for it.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # As MiddlewareMixin does: lets the handler await __call__
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        self.refresh(request)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        self.refresh(request)
+        return response
+
+    def refresh(self, request):
+        # Only touches a session that is already loaded: no I/O here
+        session = getattr(request, 'session', None)
+        if session is None or not session.accessed or session.is_empty():
+            return
+
+        now = int(time.time())
+        if session.modified:
+            # Already being saved; stamp it for free.
+            session[REFRESHED_AT_KEY] = now
+            return
+
+        refreshed_at = session.get(REFRESHED_AT_KEY, 0)
+        remaining = settings.SESSION_COOKIE_AGE - (now - refreshed_at)
+        if remaining < settings.SESSION_REFRESH_THRESHOLD:
+            session[REFRESHED_AT_KEY] = now
@@ -0,0 +1,59 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:19
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+import django.db.models.functions.text
+
+
+def lowercase_identifiers(apps, schema_editor):
+    User = apps.get_model('authentication', 'User')
+    for field in ('email', 'username'):
+        clashes = list(
+            User.objects.annotate(normalized=Lower(field))
+            .values('normalized')
+            .annotate(count=Count('id'))
+            .filter(count__gt=1)
+            .values_list('normalized', flat=True)[:10]
+        )
+        if clashes:
+            raise RuntimeError(
+                f'Cannot lowercase {field}: these values are used by more than one '
+                f'user in different cases: {", ".join(clashes)}. Merge or rename them first.'
+            )
+
+    # Compared in Python: under MySQL's case-insensitive collations
+    # email = LOWER(email) holds even for mixed-case values.
+    changed = [
+        pk for pk, email, username in User.objects.values_list('pk', 'email', 'username').iterator()
+        if email != email.lower() or username != username.lower()
+    ]
+    UserSyncOutbox = apps.get_model('authentication', 'UserSyncOutbox')
+    for start in range(0, len(changed), 1000):
+        batch = changed[start:start + 1000]
+        User.objects.filter(pk__in=batch).update(email=Lower('email'), username=Lower('username'))
+        # Queue the profile sync, as User.save() would
+        UserSyncOutbox.objects.bulk_create([UserSyncOutbox(user_id=pk, operation='upsert') for pk in batch])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0003_user_directory_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['date_of_birth'], name='user_dob_idx'),
+        ),
+        migrations.RunPython(lowercase_identifiers, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.CheckConstraint(check=models.Q(('email', django.db.models.functions.text.Lower('email'))), name='user_email_lowercase'),
+        ),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.CheckConstraint(check=models.Q(('username', django.db.models.functions.text.Lower('username'))), name='user_username_lowercase'),
+        ),
+    ]
@@ -1,5 +1,14 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+
+def normalize_identifier(value):
+    """The stored form of an email or username: stripped and lowercased."""
+    return value.strip().lower() if value else value
+
 
 class User(AbstractUser):
     GENDER_CHOICES = [
@@ -40,10 +49,132 @@ class User(AbstractUser):
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    
+    # Signed access tokens carry this; bumping it revokes them all
+    token_version = models.PositiveIntegerField(default=0)
+
+    # Fields mirrored into the MongoDB UserProfile collection
+    SYNCED_FIELDS = (
+        'username', 'email', 'first_name', 'last_name', 'university',
+        'blood_group', 'mobile_no', 'gender', 'date_of_birth', 'address',
+    )
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.email})"
     
+    @classmethod
+    def normalize_username(cls, username):
+        return normalize_identifier(super().normalize_username(username))
+    
+    def clean(self):
+        super().clean()
+        # Before ModelForm's unique checks, so they compare stored forms
+        self.email = normalize_identifier(self.email)
+        self.username = normalize_identifier(self.username)
+    
+    def save(self, *args, **kwargs):
+        # Stored lowercase so lookups can be exact and index-backed, and the
+        # unique indexes are effectively case-insensitive
+        self.email = normalize_identifier(self.email)
+        self.username = normalize_identifier(self.username)
+        
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not set(update_fields) & set(self.SYNCED_FIELDS):
+            # e.g. last_login or password only: nothing to sync
+            return super().save(*args, **kwargs)
+        
+        # Queue the profile sync in the same transaction as the write
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            super().save(*args, **kwargs)
+            UserSyncOutbox.objects.create(user_id=self.pk, operation=UserSyncOutbox.UPSERT)
+    
     class Meta:
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+        # Directory filters, and keyset pagination on (date_joined, id)
+        # alone or after an equality filter; user_joined_idx also serves
+        # the admin's -date_joined ordering
+        indexes = [
+            models.Index(fields=['date_of_birth'], name='user_dob_idx'),
+            models.Index(fields=['date_joined', 'id'], name='user_joined_idx'),
+            models.Index(fields=['university', 'date_joined', 'id'], name='user_univ_joined_idx'),
+            models.Index(fields=['blood_group', 'date_joined', 'id'], name='user_blood_joined_idx'),
+            models.Index(fields=['gender', 'date_joined', 'id'], name='user_gender_joined_idx'),
+            # Rows edited since the availability index's last refresh
+            models.Index(fields=['updated_at'], name='user_updated_idx'),
+        ]
+        # With the unique indexes on email and username, these make
+        # uniqueness case-insensitive (Django 3.2 has no functional
+        # unique constraints)
+        constraints = [
+            models.CheckConstraint(check=Q(email=Lower('email')), name='user_email_lowercase'),
+            models.CheckConstraint(check=Q(username=Lower('username')), name='user_username_lowercase'),
+        ]
+
+
+class UserSyncOutbox(models.Model):
+    """
+    Pending changes to mirror into the MongoDB UserProfile collection.
+
+    Rows are written in the same transaction as the User change and removed
+    by the dispatcher (authentication/outbox.py) once they have been applied.
+    """
+    UPSERT = 'upsert'
+    DELETE = 'delete'
+    OPERATION_CHOICES = [
+        (UPSERT, 'Upsert'),
+        (DELETE, 'Delete'),
+    ]
+    
+    # Not a foreign key: delete events must outlive the user row
+    user_id = models.BigIntegerField()
+    operation = models.CharField(max_length=10, choices=OPERATION_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"{self.operation} user {self.user_id}"
+    
+    class Meta:
+        verbose_name = 'User sync outbox entry'
+        verbose_name_plural = 'User sync outbox'
+        indexes = [
+            models.Index(fields=['available_at', 'id'], name='outbox_available_idx'),
+        ]
+
+
+class UserSearchTrigram(models.Model):
+    """
+    One row per distinct trigram in a user's name, username and email.
+
+    Maintained by authentication/search.py; the (trigram, user) index turns
+    a search into an index range scan instead of LIKE '%term%' scans.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='search_trigrams')
+    trigram = models.CharField(max_length=3)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['trigram', 'user'], name='search_trigram_user_uniq'),
+        ]
+
+
+class RefreshToken(models.Model):
+    """
+    A server-side refresh token for signed access tokens.
+
+    Only the SHA-256 digest of the token is stored. Using a token revokes it
+    and issues its successor in the same family; presenting a revoked token
+    again revokes the whole family (see authentication/access_tokens.py).
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='refresh_tokens')
+    digest = models.CharField(max_length=64, unique=True)
+    family = models.UUIDField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    revoked_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"Refresh token {self.pk} for user {self.user_id}"
@@ -0,0 +1,109 @@
+"""
+Lazy, per-process MongoDB connection for the ``UserProfile`` documents.
+
+Nothing connects at import or startup. The first call to ``ensure_connected``
+registers the mongoengine alias with ``connect=False``, so even then pymongo
+only opens sockets when the first operation runs. The request path never
+touches MongoDB (profiles are synced through the outbox), so only the
+dispatcher and management commands pay for the connection.
+
+Each process owns its own pool of ``MAX_POOL_SIZE`` sockets, so a deployment
+opens roughly ``workers x MAX_POOL_SIZE`` connections; size it with that in
+mind. pymongo clients must not be shared across ``fork()``: a child that
+inherited a connected client drops it, without closing the parent's sockets,
+and reconnects on first use.
+"""
+
+import os
+import threading
+import time
+
+import mongoengine
+from django.conf import settings
+from mongoengine import connection as mongoengine_connection
+
+DEFAULTS = {
+    'HOST': 'mongodb://localhost:27017',
+    'NAME': 'login_reg_db',
+    'ALIAS': mongoengine.DEFAULT_CONNECTION_NAME,
+    'MAX_POOL_SIZE': 10,
+    'MIN_POOL_SIZE': 0,
+    'CONNECT_TIMEOUT_MS': 5000,
+    'SERVER_SELECTION_TIMEOUT_MS': 5000,
+    'SOCKET_TIMEOUT_MS': 10000,
+    'MAX_IDLE_TIME_MS': 60000,
+    # Use mongomock instead of a server (tests and benchmarks)
+    'MOCK': False,
+}
+
+
+class MongoConnectionManager:
+    def __init__(self, options=None):
+        self.options = {**DEFAULTS, **(options or {})}
+        self._lock = threading.Lock()
+        self._pid = None
+
+    @property
+    def alias(self):
+        return self.options['ALIAS']
+
+    @property
+    def connected(self):
+        return self._pid == os.getpid()
+
+    def client_kwargs(self):
+        kwargs = {
+            'host': self.options['HOST'],
+            'maxPoolSize': self.options['MAX_POOL_SIZE'],
+            'minPoolSize': self.options['MIN_POOL_SIZE'],
+            'connectTimeoutMS': self.options['CONNECT_TIMEOUT_MS'],
+            'serverSelectionTimeoutMS': self.options['SERVER_SELECTION_TIMEOUT_MS'],
+            'socketTimeoutMS': self.options['SOCKET_TIMEOUT_MS'],
+            'maxIdleTimeMS': self.options['MAX_IDLE_TIME_MS'],
+            'connect': False,
+        }
+        if self.options['MOCK']:
+            import mongomock
+            kwargs['mongo_client_class'] = mongomock.MongoClient
+        return kwargs
+
+    def ensure_connected(self):
+        """Register the connection for this process if it isn't already."""
+        if self.connected:
+            return
+        with self._lock:
+            if self.connected:
+                return
+            if self._pid is not None:
+                self._forget_inherited_client()
+            mongoengine.connect(self.options['NAME'], alias=self.alias, **self.client_kwargs())
+            self._pid = os.getpid()
+
+    def _forget_inherited_client(self):
+        # The parent still uses these sockets, so drop our reference to the
+        # client rather than closing it; disconnect() then clears the
+        # database and collection handles cached on the documents.
+        mongoengine_connection._connections.pop(self.alias, None)
+        mongoengine.disconnect(self.alias)
+
+    def get_db(self):
+        self.ensure_connected()
+        return mongoengine.get_db(self.alias)
+
+    def disconnect(self):
+        with self._lock:
+            if self.connected:
+                mongoengine.disconnect(self.alias)
+            self._pid = None
+
+    def ping(self):
+        """Health probe: round-trip a ``ping`` command to the server."""
+        start = time.perf_counter()
+        try:
+            self.get_db().command('ping')
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+        return {'ok': True, 'latency_ms': round((time.perf_counter() - start) * 1000, 3)}
+
+
+mongo_connection = MongoConnectionManager(getattr(settings, 'MONGODB', None))
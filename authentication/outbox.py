@@ -0,0 +1,173 @@
+"""
+Dispatcher that drains ``UserSyncOutbox`` into the MongoDB UserProfile store.
+
+``User.save()`` and the ``post_delete`` signal write outbox rows inside the
+same transaction as the user change, so login and registration never wait
+on MongoDB. ``manage.py dispatch_outbox`` then claims batches of rows
+(``SELECT ... FOR UPDATE SKIP LOCKED`` where supported, so several
+dispatchers can run side by side), collapses them to one operation per user,
+and applies them with a single bulk write keyed by ``django_user_id``.
+Because each upsert writes the user's current row, replaying a batch is
+harmless. Failed batches stay in the outbox with exponential backoff.
+
+The store is pluggable: ``MongoProfileStore`` talks to the real collection
+through ``mongo_connection`` and ``InMemoryProfileStore`` stands in for it
+in tests.
+"""
+
+import datetime
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import UserSyncOutbox
+from .mongo import mongo_connection
+
+DEFAULTS = {
+    'STORE': 'authentication.outbox.MongoProfileStore',
+    'BATCH_SIZE': 500,
+    'RETRY_BACKOFF': 5,
+    'MAX_BACKOFF': 300,
+}
+
+
+def profile_document(user):
+    """The UserProfile fields for ``user``, ready for a bulk upsert."""
+    doc = {field: getattr(user, field) for field in user.SYNCED_FIELDS}
+    if doc['date_of_birth'] is not None:
+        # BSON has no date type; store midnight like mongoengine's DateField
+        doc['date_of_birth'] = datetime.datetime.combine(doc['date_of_birth'], datetime.time())
+    doc['django_user_id'] = str(user.pk)
+    doc['updated_at'] = timezone.now()
+    return doc
+
+
+class InMemoryProfileStore:
+    """A dict-backed stand-in for the UserProfile collection."""
+
+    def __init__(self):
+        self.documents = {}
+
+    def bulk_upsert(self, documents):
+        for doc in documents:
+            self.documents.setdefault(doc['django_user_id'], {}).update(doc)
+
+    def bulk_delete(self, user_ids):
+        for user_id in user_ids:
+            self.documents.pop(user_id, None)
+
+
+class MongoProfileStore:
+    """Writes to the ``user_profiles`` collection behind ``UserProfile``."""
+
+    @property
+    def collection(self):
+        from .mongo_models import UserProfile
+        mongo_connection.ensure_connected()
+        return UserProfile._get_collection()
+
+    def bulk_upsert(self, documents):
+        from pymongo import UpdateOne
+
+        if documents:
+            self.collection.bulk_write([
+                UpdateOne(
+                    {'django_user_id': doc['django_user_id']},
+                    {'$set': doc, '$setOnInsert': {'created_at': doc['updated_at']}},
+                    upsert=True,
+                )
+                for doc in documents
+            ], ordered=False)
+
+    def bulk_delete(self, user_ids):
+        if user_ids:
+            self.collection.delete_many({'django_user_id': {'$in': list(user_ids)}})
+
+
+class OutboxDispatcher:
+    def __init__(self, store=None, options=None):
+        self.options = {**DEFAULTS, **(options or {})}
+        self.store = store if store is not None else import_string(self.options['STORE'])()
+        self.counters = {'batches': 0, 'dispatched': 0, 'failed_batches': 0}
+        self.last_lag_seconds = 0.0
+
+    def dispatch_batch(self):
+        """Apply one batch of due outbox rows; return how many were applied."""
+        User = get_user_model()
+        now = timezone.now()
+        with transaction.atomic():
+            rows = list(
+                UserSyncOutbox.objects.select_for_update(skip_locked=True)
+                .filter(available_at__lte=now)
+                .order_by('id')[:self.options['BATCH_SIZE']]
+            )
+            if not rows:
+                return 0
+
+            # Last operation per user wins; upserts read the current row.
+            latest = {row.user_id: row.operation for row in rows}
+            users = User.objects.in_bulk(
+                [user_id for user_id, op in latest.items() if op == UserSyncOutbox.UPSERT]
+            )
+            upserts = [profile_document(user) for user in users.values()]
+            deletes = [str(user_id) for user_id in latest if user_id not in users]
+
+            try:
+                self.store.bulk_upsert(upserts)
+                self.store.bulk_delete(deletes)
+            except Exception as e:
+                self.retry_later(rows, e, now)
+                self.counters['failed_batches'] += 1
+                return 0
+
+            UserSyncOutbox.objects.filter(pk__in=[row.pk for row in rows]).delete()
+
+        self.counters['batches'] += 1
+        self.counters['dispatched'] += len(rows)
+        self.last_lag_seconds = (now - rows[0].created_at).total_seconds()
+        return len(rows)
+
+    def retry_later(self, rows, error, now):
+        for row in rows:
+            row.attempts += 1
+            delay = min(
+                self.options['RETRY_BACKOFF'] * 2 ** (row.attempts - 1),
+                self.options['MAX_BACKOFF'],
+            )
+            row.available_at = now + datetime.timedelta(seconds=delay)
+            row.last_error = repr(error)
+        UserSyncOutbox.objects.bulk_update(rows, ['attempts', 'available_at', 'last_error'])
+
+    def drain(self):
+        """Dispatch batches until nothing is due; return rows applied."""
+        total = 0
+        while True:
+            applied = self.dispatch_batch()
+            if not applied:
+                return total
+            total += applied
+
+    def run_forever(self, interval, stop=lambda: False):
+        while not stop():
+            if not self.drain():
+                time.sleep(interval)
+
+    def stats(self):
+        """Counters plus the current backlog and its age."""
+        pending = UserSyncOutbox.objects.order_by('id')
+        oldest = pending.values_list('created_at', flat=True).first()
+        data = dict(self.counters)
+        data['pending'] = pending.count()
+        data['oldest_pending_seconds'] = (
+            (timezone.now() - oldest).total_seconds() if oldest else 0.0
+        )
+        data['last_lag_seconds'] = self.last_lag_seconds
+        return data
+
+
+def outbox_dispatcher(store=None):
+    return OutboxDispatcher(store, getattr(settings, 'USER_PROFILE_SYNC', None))
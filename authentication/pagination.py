@@ -0,0 +1,100 @@
+"""
+Keyset (seek) pagination for large user listings.
+
+Pages are ordered newest first on ``(date_joined, id)`` and the cursor holds
+the last row's values, so the next page is fetched with
+
+    WHERE date_joined <= d AND (date_joined < d OR id < i)
+    ORDER BY date_joined DESC, id DESC LIMIT n
+
+which an index ending in ``(date_joined, id)`` answers by seeking straight
+to the position, so page 10 000 costs the same as page 1. The redundant
+``date_joined <= d`` is what lets MySQL and SQLite turn the OR into a range
+seek. DRF's ``CursorPagination`` keys on a single field and falls back to
+an offset for ties, which is why this is a separate class.
+"""
+
+import base64
+import binascii
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class DateJoinedCursorPagination(BasePagination):
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 20
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+
+        queryset = queryset.order_by('-date_joined', '-id')
+        if position is not None:
+            date_joined, pk = position
+            queryset = queryset.filter(
+                Q(date_joined__lt=date_joined) | Q(id__lt=pk), date_joined__lte=date_joined
+            )
+
+        # One extra row tells us whether there is a next page.
+        page = list(queryset[:page_size + 1])
+        self.next_position = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            self.next_position = (page[-1].date_joined, page[-1].pk)
+        return page
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            date_joined, pk = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii').split('|')
+            date_joined = parse_datetime(date_joined)
+            pk = int(pk)
+        except (binascii.Error, UnicodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if date_joined is None:
+            raise NotFound(self.invalid_cursor_message)
+        return date_joined, pk
+
+    def encode_cursor(self, position):
+        date_joined, pk = position
+        raw = f'{date_joined.isoformat()}|{pk}'
+        return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,72 @@
+"""
+Rendered-response cache for the current user's profile payload.
+
+``ProfileView`` GET and ``user_info`` serve the same ``UserProfileSerializer``
+JSON for a user until the row changes. The rendered bytes and their ETag are
+cached per user id, tagged with ``updated_at``, so a hit skips serialization
+and rendering entirely and a matching ``If-None-Match`` gets a 304. A miss
+renders with the precompiled ``user_profile`` serializer.
+
+Entries are dropped by the ``post_save``/``post_delete`` signals, which
+covers profile updates, password changes, ``last_login`` updates and admin
+edits; the ``updated_at`` tag guards against anything that slips past them.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+
+from .compiled_serializers import user_profile
+
+DEFAULTS = {
+    'CACHE_ALIAS': 'default',
+    'KEY_PREFIX': 'profile',
+    'TIMEOUT': 300,
+}
+
+
+class ProfileCache:
+    def __init__(self, options=None):
+        self.options = {**DEFAULTS, **(options or {})}
+
+    @property
+    def cache(self):
+        return caches[self.options['CACHE_ALIAS']]
+
+    def key(self, user_id):
+        return f"{self.options['KEY_PREFIX']}:{user_id}"
+
+    def render(self, user):
+        """Return ``(etag, body)`` for ``user``, rendering on a miss."""
+        stamp = user.updated_at.isoformat()
+        entry = self.cache.get(self.key(user.pk))
+        if entry is not None and entry[0] == stamp:
+            return entry[1], entry[2]
+
+        body = user_profile.render(user)
+        etag = '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.cache.set(self.key(user.pk), (stamp, etag, body), self.options['TIMEOUT'])
+        return etag, body
+
+    def response(self, request, user):
+        """A JSON response for ``user``'s profile, or 304 if unchanged."""
+        etag, body = self.render(user)
+        if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+        if etag in if_none_match or '*' in if_none_match:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        # Per-user data: browsers may keep it but must revalidate.
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def invalidate(self, user_id):
+        self.cache.delete(self.key(user_id))
+
+
+profile_cache = ProfileCache(getattr(settings, 'PROFILE_CACHE', None))
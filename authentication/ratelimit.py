@@ -0,0 +1,291 @@
+"""
+Sliding-window rate limiting for the anonymous endpoints.
+
+Each rule counts requests per client IP and, for login, per account
+identifier. Counters use the sliding-window approximation: a key keeps only
+the count of the current fixed window and of the previous one, and the
+previous count is weighted by how much of it still overlaps the sliding
+window. That is three numbers per key instead of a timestamp per request,
+and it never lets a burst through at a window boundary the way fixed
+windows do.
+
+Counters live in a bounded in-process map by default. With ``BACKEND``
+set to ``'cache'`` they are kept in a Django cache instead
+(``CACHE_ALIAS``), so that every worker process shares the same limits;
+use Redis or Memcached there, whose ``incr`` is atomic.
+
+Failed logins are counted per account as well. Once an account has
+``LOCKOUT`` failures in its window, logins for it are refused until the
+count decays, whichever IP they come from; a successful login clears it.
+The check runs before the account is looked up, so it goes by the
+identifier as sent. Failures against a known account are therefore recorded
+under both its email and its username, and alternating between the two
+shares one budget.
+
+Limits are checked by the DRF throttles below and by ``async_api_view``;
+both run before the body is validated, so a rejected request costs no
+password hash and no query.
+"""
+
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+from .models import normalize_identifier
+
+DEFAULTS = {
+    'ENABLED': True,
+    # 'local' (per process) or 'cache' (shared through CACHE_ALIAS)
+    'BACKEND': 'local',
+    'CACHE_ALIAS': 'default',
+    'KEY_PREFIX': 'ratelimit',
+    # Keys kept by the local backend; the least recently used go first
+    'MAX_KEYS': 100000,
+    # '<requests>/<period>' per scope and key type, where the period is
+    # s, m, h or d with an optional multiplier ('5/15m')
+    'RULES': {
+        'login': {'ip': '30/m', 'account': '10/m'},
+        'register': {'ip': '10/h'},
+        'check': {'ip': '60/m'},
+    },
+    # Failed logins per account before it is locked out; None disables it
+    'LOCKOUT': '5/15m',
+}
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+RATE_RE = re.compile(r'^\s*(\d+)\s*/\s*(\d*)\s*([smhd])\w*\s*$')
+
+
+def parse_rate(rate):
+    """``'5/15m'`` -> ``(5, 900)``."""
+    match = RATE_RE.match(rate)
+    if match is None:
+        raise ValueError(f'Invalid rate {rate!r}, expected e.g. "10/m" or "5/15m"')
+    count, multiplier, unit = match.groups()
+    return int(count), int(multiplier or 1) * PERIODS[unit[0]]
+
+
+def estimate(current, previous, elapsed, period):
+    """Requests in the sliding window ending ``elapsed`` seconds into the current one."""
+    return previous * (period - elapsed) / period + current
+
+
+def retry_after(current, previous, elapsed, limit, period):
+    """Seconds until one more request fits under ``limit``; 0 if it fits now."""
+    if estimate(current, previous, elapsed, period) + 1 <= limit:
+        return 0
+    if current + 1 > limit:
+        # Only once this window is over, and the next one has let
+        # enough of it slide out
+        return period - elapsed + period * (1 - (limit - 1) / current)
+    return period * (1 - (limit - current - 1) / previous) - elapsed
+
+
+class LocalWindowStore:
+    """Per-process counters: ``key -> (window start, current, previous)``."""
+
+    def __init__(self, max_keys, clock=time.time):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._windows = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _load(self, key, period, now):
+        start = now - now % period
+        entry = self._windows.get(key)
+        if entry is None:
+            return start, 0, 0
+        if entry[0] == start:
+            return entry
+        previous = entry[1] if entry[0] == start - period else 0
+        return start, 0, previous
+
+    def _store(self, key, entry):
+        self._windows[key] = entry
+        self._windows.move_to_end(key)
+        if len(self._windows) > self.max_keys:
+            self._windows.popitem(last=False)
+
+    def hit(self, key, limit, period, count=True):
+        """Count a request unless it is over ``limit``; return the wait in seconds."""
+        with self._lock:
+            now = self.clock()
+            start, current, previous = self._load(key, period, now)
+            wait = retry_after(current, previous, now - start, limit, period)
+            if count and not wait:
+                self._store(key, (start, current + 1, previous))
+            return wait
+
+    def add(self, key, period):
+        """Count an event without a limit."""
+        with self._lock:
+            start, current, previous = self._load(key, period, self.clock())
+            self._store(key, (start, current + 1, previous))
+
+    def reset(self, key, period):
+        with self._lock:
+            self._windows.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._windows.clear()
+
+
+class CacheWindowStore:
+    """Counters shared through a Django cache, one key per key and window."""
+
+    def __init__(self, cache_alias, prefix, clock=time.time):
+        self.cache_alias = cache_alias
+        self.prefix = prefix
+        self.clock = clock
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def _keys(self, key, period, now):
+        window = int(now // period)
+        return f'{self.prefix}:{key}:{window}', f'{self.prefix}:{key}:{window - 1}'
+
+    def _increment(self, cache_key, period):
+        # The previous window is read for up to another period
+        if not self.cache.add(cache_key, 1, period * 2):
+            try:
+                self.cache.incr(cache_key)
+            except ValueError:
+                # Expired between add() and incr()
+                self.cache.set(cache_key, 1, period * 2)
+
+    def hit(self, key, limit, period, count=True):
+        now = self.clock()
+        current_key, previous_key = self._keys(key, period, now)
+        values = self.cache.get_many([current_key, previous_key])
+        wait = retry_after(
+            values.get(current_key, 0), values.get(previous_key, 0), now % period, limit, period
+        )
+        if count and not wait:
+            self._increment(current_key, period)
+        return wait
+
+    def add(self, key, period):
+        self._increment(self._keys(key, period, self.clock())[0], period)
+
+    def reset(self, key, period):
+        self.cache.delete_many(self._keys(key, period, self.clock()))
+
+    def clear(self):
+        pass
+
+
+class RateLimiter:
+    def __init__(self, options=None):
+        self.options = {**DEFAULTS, **(options or {})}
+        self._store = None
+        self._lock = threading.Lock()
+
+    @property
+    def store(self):
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    if self.options['BACKEND'] == 'cache':
+                        self._store = CacheWindowStore(
+                            self.options['CACHE_ALIAS'], self.options['KEY_PREFIX']
+                        )
+                    else:
+                        self._store = LocalWindowStore(self.options['MAX_KEYS'])
+        return self._store
+
+    def check(self, scope, ip, identifier=None):
+        """
+        Count a request to ``scope``; return how many seconds the client
+        must wait if it is over a limit (or its account is locked), else 0.
+        """
+        if not self.options['ENABLED']:
+            return 0
+        account = normalize_identifier(identifier) if isinstance(identifier, str) else ''
+        if account and self.options['LOCKOUT']:
+            limit, period = parse_rate(self.options['LOCKOUT'])
+            # Only failed logins count towards the lockout
+            wait = self.store.hit(f'lockout:{account}', limit, period, count=False)
+            if wait:
+                return wait
+
+        rules = self.options['RULES'].get(scope, {})
+        for kind, key in (('ip', ip), ('account', account)):
+            if key and kind in rules:
+                limit, period = parse_rate(rules[kind])
+                wait = self.store.hit(f'{scope}:{kind}:{key}', limit, period)
+                if wait:
+                    return wait
+        return 0
+
+    def _lockout_keys(self, identifier, user=None):
+        if not (self.options['ENABLED'] and self.options['LOCKOUT'] and isinstance(identifier, str)):
+            return [], None
+        names = {normalize_identifier(identifier)}
+        if user is not None:
+            names.update((user.email, user.username))
+        return [f'lockout:{name}' for name in sorted(names)], parse_rate(self.options['LOCKOUT'])[1]
+
+    def login_failed(self, identifier, user=None):
+        """Count a failure for ``identifier`` and, if known, every identifier of ``user``."""
+        keys, period = self._lockout_keys(identifier, user)
+        for key in keys:
+            self.store.add(key, period)
+
+    def login_succeeded(self, identifier, user=None):
+        keys, period = self._lockout_keys(identifier, user)
+        for key in keys:
+            self.store.reset(key, period)
+
+    def reset(self):
+        """Forget every local counter (shared cache counters expire on their own)."""
+        self.store.clear()
+
+
+def client_ip(request):
+    """The client address, honouring DRF's NUM_PROXIES like its throttles."""
+    return BaseThrottle().get_ident(request)
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    A DRF throttle backed by ``rate_limiter``. Subclasses set ``scope`` and,
+    to also limit per account, the request field naming the account.
+    """
+    scope = None
+    identifier_field = None
+
+    def allow_request(self, request, view):
+        identifier = None
+        if self.identifier_field and isinstance(request.data, Mapping):
+            identifier = request.data.get(self.identifier_field)
+        self.wait_seconds = rate_limiter.check(self.scope, self.get_ident(request), identifier)
+        return not self.wait_seconds
+
+    def wait(self):
+        return math.ceil(self.wait_seconds)
+
+
+class LoginThrottle(SlidingWindowThrottle):
+    scope = 'login'
+    identifier_field = 'email_or_username'
+
+
+class RegisterThrottle(SlidingWindowThrottle):
+    scope = 'register'
+
+
+class CheckThrottle(SlidingWindowThrottle):
+    scope = 'check'
+
+
+rate_limiter = RateLimiter(getattr(settings, 'RATE_LIMITS', None))
@@ -0,0 +1,11 @@
+from rest_framework import renderers
+
+from . import metrics
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    """DRF's JSONRenderer, with its time counted as serialization in the request metrics."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with metrics.timing('serialize_seconds'):
+            return super().render(data, accepted_media_type, renderer_context)
@@ -0,0 +1,160 @@
+"""
+Trigram search over user names, usernames and emails.
+
+Each user's searchable text is split into words and every word, padded as
+``"  word "``, into trigrams; the distinct trigrams are stored in
+``UserSearchTrigram`` with an index on ``(trigram, user_id)``. A query is
+split the same way, except that its last word gets no trailing pad so it
+matches as a prefix. Candidates are the users sharing the most trigrams
+with the query, found with one indexed ``IN``/``GROUP BY`` query, so typos
+still match ("jonh" finds "john") and nothing scans the user table.
+
+Candidates are then ranked by trigram similarity, with a bonus for an
+exact or prefix match on a whole field.
+
+Only the local part of an email is indexed: domains like ``gmail.com``
+would add the same trigrams to most users. ``UserAdmin`` matches full
+addresses through the unique email index and partial ones with icontains.
+
+The index is kept current by the ``post_save`` signal and by
+``import_users``; ``manage.py rebuild_search_index`` rebuilds it. The signal
+only runs for saves that may touch a searchable field, and then only writes
+the trigrams that changed.
+"""
+
+import math
+import re
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+from .models import User, UserSearchTrigram
+
+DEFAULTS = {
+    # Fraction of the query's trigrams a user must share to match
+    'MIN_SIMILARITY': 0.5,
+    # Candidates fetched per requested result, before ranking
+    'CANDIDATE_FACTOR': 5,
+    'MAX_RESULTS': 100,
+}
+
+SEARCH_FIELDS = ('first_name', 'last_name', 'username', 'email')
+
+WORD_RE = re.compile(r'[^\W_]+')
+
+
+def words(text):
+    return WORD_RE.findall(text.lower())
+
+
+def trigrams(text, prefix=False):
+    """The distinct trigrams of ``text``; ``prefix`` leaves the last word open."""
+    found = set()
+    tokens = words(text)
+    for i, word in enumerate(tokens):
+        padded = f'  {word}' if prefix and i == len(tokens) - 1 else f'  {word} '
+        found.update(padded[j:j + 3] for j in range(len(padded) - 2))
+    return found
+
+
+def searchable_text(user):
+    email_local = (user.email or '').split('@', 1)[0]
+    return ' '.join(filter(None, [user.first_name, user.last_name, user.username, email_local]))
+
+
+class SearchIndex:
+    def __init__(self, options=None):
+        self.options = {**DEFAULTS, **(options or {})}
+
+    def index_users(self, users, replace=True):
+        """
+        Write the trigram rows for ``users``. With ``replace``, existing rows
+        are diffed against the new ones, so a save that leaves the searchable
+        text alone costs one SELECT and no writes.
+        """
+        wanted = {user.pk: trigrams(searchable_text(user)) for user in users}
+        stale = []
+        if replace:
+            existing = UserSearchTrigram.objects.filter(user_id__in=wanted).values_list('id', 'user_id', 'trigram')
+            for row_id, user_id, gram in existing:
+                if gram in wanted[user_id]:
+                    wanted[user_id].discard(gram)
+                else:
+                    stale.append(row_id)
+        rows = [
+            UserSearchTrigram(user_id=user_id, trigram=gram)
+            for user_id, grams in wanted.items()
+            for gram in grams
+        ]
+        if not stale and not rows:
+            return
+        with transaction.atomic():
+            if stale:
+                UserSearchTrigram.objects.filter(pk__in=stale).delete()
+            # Accent-insensitive collations (MySQL) may fold two trigrams
+            # of one user together; either copy will do.
+            UserSearchTrigram.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+
+    def rebuild(self, batch_size=2000):
+        """Reindex every user, walking the table by primary key."""
+        UserSearchTrigram.objects.all().delete()
+        last_id = 0
+        total = 0
+        while True:
+            batch = list(
+                User.objects.filter(pk__gt=last_id).order_by('pk').only(*SEARCH_FIELDS)[:batch_size]
+            )
+            if not batch:
+                return total
+            self.index_users(batch, replace=False)
+            total += len(batch)
+            last_id = batch[-1].pk
+
+    def query_trigrams(self, term):
+        grams = trigrams(term, prefix=True)
+        # "  j"-style grams match every word starting with that letter;
+        # only keep them when the query has nothing more selective.
+        selective = {gram for gram in grams if not gram.startswith('  ')}
+        return selective or grams
+
+    def candidates(self, term, limit):
+        """``({user_id: shared trigrams}, query trigram count)`` for the best matches."""
+        grams = self.query_trigrams(term)
+        if not grams:
+            return {}, 0
+        min_hits = max(1, math.ceil(len(grams) * self.options['MIN_SIMILARITY']))
+        rows = (
+            UserSearchTrigram.objects.filter(trigram__in=grams)
+            .values('user_id')
+            .annotate(hits=Count('id'))
+            .filter(hits__gte=min_hits)
+            .order_by('-hits', 'user_id')
+            .values_list('user_id', 'hits')[:limit * self.options['CANDIDATE_FACTOR']]
+        )
+        return dict(rows), len(grams)
+
+    def search(self, term, limit=20, queryset=None):
+        """Return up to ``limit`` ``(user, score)`` pairs, best first."""
+        limit = min(limit, self.options['MAX_RESULTS'])
+        hits, total = self.candidates(term, limit)
+        if not hits:
+            return []
+        queryset = User.objects.all() if queryset is None else queryset
+        users = queryset.filter(pk__in=hits)
+
+        needle = ' '.join(words(term))
+        ranked = []
+        for user in users:
+            score = hits[user.pk] / total
+            values = [' '.join(words(getattr(user, field) or '')) for field in SEARCH_FIELDS]
+            if needle in values:
+                score += 1.0
+            elif any(value.startswith(needle) for value in values):
+                score += 0.5
+            ranked.append((user, round(score, 4)))
+        ranked.sort(key=lambda pair: (-pair[1], pair[0].pk))
+        return ranked[:limit]
+
+
+search_index = SearchIndex(getattr(settings, 'USER_SEARCH', None))
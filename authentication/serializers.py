@@ -1,7 +1,12 @@
+from collections.abc import Mapping
+
 from rest_framework import serializers
 from django.contrib.auth import authenticate
+from django.conf import settings
 from django.contrib.auth.password_validation import validate_password
-from .models import User
+from . import metrics
+from .hash_pool import hash_pool
+from .models import User, normalize_identifier
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, validators=[validate_password])
@@ -20,6 +25,18 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             'last_name': {'required': True},
         }
     
+    def to_internal_value(self, data):
+        # Normalize before the unique validators run, so "Alice" is
+        # reported as taken when "alice" exists (see User.save)
+        if not isinstance(data, Mapping):
+            # DRF reports the "expected a dictionary" error
+            return super().to_internal_value(data)
+        data = data.copy()
+        for field in ('email', 'username'):
+            if isinstance(data.get(field), str):
+                data[field] = normalize_identifier(data[field])
+        return super().to_internal_value(data)
+    
     def validate(self, attrs):
         if attrs['password'] != attrs['password_confirm']:
             raise serializers.ValidationError("Passwords don't match")
@@ -28,42 +45,37 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         validated_data.pop('password_confirm')
         password = validated_data.pop('password')
+        # Callers that already hashed the password (the async views) pass
+        # it through save(password_hash=...).
+        password_hash = validated_data.pop('password_hash', None)
         
-        # Create Django User with all fields
-        user = User.objects.create_user(**validated_data)
-        user.set_password(password)
+        # Same normalization as create_user, but the hash is computed on
+        # hash_pool and the user is written with a single INSERT.
+        user = User(**validated_data)
+        user.email = User.objects.normalize_email(user.email)
+        user.username = User.normalize_username(user.username)
+        user.password = password_hash or hash_pool.make_password(password)
         user.save()
-        
         return user
 
 class UserLoginSerializer(serializers.Serializer):
     email_or_username = serializers.CharField()
     password = serializers.CharField(write_only=True)
+    # Start a Django session too; None means settings.LOGIN_CREATES_SESSION
+    session = serializers.BooleanField(required=False, allow_null=True, default=None)
     
     def validate(self, attrs):
         email_or_username = attrs.get('email_or_username')
         password = attrs.get('password')
         
         if email_or_username and password:
-            # Try to authenticate with email first
+            # EmailOrUsernameBackend resolves either form in one query
             user = authenticate(
                 request=self.context.get('request'),
                 username=email_or_username,
                 password=password
             )
             
-            # If email authentication fails, try with username
-            if not user:
-                try:
-                    user_obj = User.objects.get(username=email_or_username)
-                    user = authenticate(
-                        request=self.context.get('request'),
-                        username=user_obj.email,
-                        password=password
-                    )
-                except User.DoesNotExist:
-                    pass
-            
             if not user:
                 raise serializers.ValidationError('Invalid credentials')
             
@@ -85,6 +97,30 @@ class UserProfileSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'username', 'email', 'date_joined', 'last_login', 'created_at', 'updated_at']
+    
+    def to_representation(self, instance):
+        with metrics.timing('serialize_seconds'):
+            return super().to_representation(instance)
+    
+    def update(self, instance, validated_data):
+        """
+        Save only the fields that changed, and skip the write if none did.
+        
+        Clients re-send whole profiles; an unchanged one leaves the row,
+        ``updated_at``, the cached responses and the MongoDB sync alone.
+        ``instance`` may be a cached ``request.user``, so the fields are
+        reloaded before they are compared.
+        """
+        serializers.raise_errors_on_nested_writes('update', self, validated_data)
+        if validated_data:
+            instance.refresh_from_db(fields=list(validated_data))
+        changed = [name for name, value in validated_data.items() if getattr(instance, name) != value]
+        if not changed:
+            return instance
+        for name in changed:
+            setattr(instance, name, validated_data[name])
+        instance.save(update_fields=[*changed, 'updated_at'])
+        return instance
 
 class ChangePasswordSerializer(serializers.Serializer):
     old_password = serializers.CharField(write_only=True)
@@ -98,6 +134,57 @@ class ChangePasswordSerializer(serializers.Serializer):
     
     def validate_old_password(self, value):
         user = self.context['request'].user
-        if not user.check_password(value):
+        if not hash_pool.check_password(user, value):
             raise serializers.ValidationError("Old password is incorrect")
         return value
+
+def identifier_value(data, field):
+    """``data[field]`` as a non-blank string, or ``None``; ``data`` is any parsed body."""
+    if not isinstance(data, Mapping):
+        return None
+    try:
+        return serializers.CharField().run_validation(data.get(field))
+    except serializers.ValidationError:
+        return None
+
+class AvailabilityBatchSerializer(serializers.Serializer):
+    emails = serializers.ListField(
+        child=serializers.CharField(), required=False, default=list,
+        max_length=settings.AVAILABILITY_BATCH_LIMIT
+    )
+    usernames = serializers.ListField(
+        child=serializers.CharField(), required=False, default=list,
+        max_length=settings.AVAILABILITY_BATCH_LIMIT
+    )
+    
+    def validate(self, attrs):
+        if not attrs['emails'] and not attrs['usernames']:
+            raise serializers.ValidationError('Provide at least one email or username')
+        return attrs
+
+class ProfileLookupSerializer(serializers.Serializer):
+    # Bounded to the BigAutoField range; larger ids overflow the query
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=2 ** 63 - 1), required=False, default=list
+    )
+    usernames = serializers.ListField(
+        child=serializers.CharField(), required=False, default=list
+    )
+    
+    def validate(self, attrs):
+        if not attrs['ids'] and not attrs['usernames']:
+            raise serializers.ValidationError('Provide at least one id or username')
+        limit = settings.PROFILE_LOOKUP_LIMIT
+        if len(attrs['ids']) + len(attrs['usernames']) > limit:
+            raise serializers.ValidationError(f'At most {limit} ids and usernames per request')
+        attrs['usernames'] = [normalize_identifier(name) for name in attrs['usernames']]
+        return attrs
+
+class UserDirectoryFilterSerializer(serializers.Serializer):
+    university = serializers.CharField(required=False)
+    blood_group = serializers.ChoiceField(choices=User.BLOOD_GROUP_CHOICES, required=False)
+    gender = serializers.ChoiceField(choices=User.GENDER_CHOICES, required=False)
+    joined_after = serializers.DateField(required=False)
+    joined_before = serializers.DateField(required=False)
+    born_after = serializers.DateField(required=False)
+    born_before = serializers.DateField(required=False)
@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .availability import availability_index
+from .models import UserSyncOutbox
+from .profile_cache import profile_cache
+from .search import SEARCH_FIELDS, search_index
+from .token_cache import token_cache
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """
+    Drop cached copies of a user whenever the row changes.
+
+    Covers profile updates, password changes, last_login updates and edits
+    made in the admin.
+    """
+    token_cache.invalidate_user(instance.pk)
+    profile_cache.invalidate(instance.pk)
+    # Until the save commits, other processes still load the old row and
+    # would cache it under the new version; retire those copies as well
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: token_cache.invalidate_user(instance.pk))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def index_user_availability(sender, instance, **kwargs):
+    """Mark the user's email and username as taken in the availability index."""
+    availability_index.add(instance.email, instance.username)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def index_user_search(sender, instance, created, update_fields=None, **kwargs):
+    """Rewrite the user's search trigrams when a searchable field may have changed."""
+    if update_fields is not None and not set(update_fields) & set(SEARCH_FIELDS):
+        return
+    search_index.index_users([instance], replace=not created)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_deleted_user(sender, instance, **kwargs):
+    token_cache.invalidate_user(instance.pk)
+    profile_cache.invalidate(instance.pk)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def queue_profile_deletion(sender, instance, **kwargs):
+    """Queue removal of the user's MongoDB profile; runs inside the delete's transaction."""
+    UserSyncOutbox.objects.create(user_id=instance.pk, operation=UserSyncOutbox.DELETE)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    token_cache.invalidate(instance.key)
+    # Other processes may hold the token locally; make their copies stale
+    token_cache.invalidate_user(instance.user_id)
@@ -0,0 +1,169 @@
+"""
+Two-tier cache for resolving auth token keys to users.
+
+Hot tokens are served from a bounded in-process LRU with a short TTL; misses
+fall through to a shared Django cache (``TOKEN_CACHE['CACHE_ALIAS']``) and
+only then to the database. Users are stored pickled so every request gets
+its own instance and a view mutating ``request.user`` cannot leak into
+other requests. Users behind signed access tokens are cached the same way,
+keyed by user id.
+
+Every entry is stamped with the user's version, a random value kept in the
+shared cache. ``invalidate_user`` (run on every ``post_save`` of a user and
+on token revocation) replaces it, so a deactivated user, a changed password
+or an edited profile makes the copies in every process stale at once: each
+hit, local or shared, checks the stamp against the shared version and
+reloads on a mismatch. That costs one small shared-cache read per request,
+still far cheaper than the database. If the version key is evicted a new
+one is made, which also only causes misses.
+
+Callers read the version *before* loading the user and pass it to ``set``
+or ``set_user``. An invalidation that lands between the load and the store
+then leaves the new entry stale, instead of stamping a user loaded before
+it with the version that was meant to retire it.
+
+``invalidate`` forgets a single token key, here and in the shared cache.
+"""
+
+import pickle
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+DEFAULTS = {
+    'CACHE_ALIAS': 'default',
+    'KEY_PREFIX': 'auth-token',
+    'MAX_ENTRIES': 10000,
+    'LOCAL_TTL': 5,
+    'SHARED_TTL': 300,
+}
+
+
+class LRUCache:
+    """A thread-safe, size-bounded LRU mapping whose entries expire."""
+
+    def __init__(self, max_entries, ttl, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= self.clock():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (self.clock() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TokenCache:
+    """Map token keys to users through the local LRU and a shared cache."""
+
+    def __init__(self, options=None):
+        self.options = {**DEFAULTS, **(options or {})}
+        self.local = LRUCache(self.options['MAX_ENTRIES'], self.options['LOCAL_TTL'])
+
+    @property
+    def shared(self):
+        return caches[self.options['CACHE_ALIAS']]
+
+    def _token_key(self, key):
+        return f"{self.options['KEY_PREFIX']}:{key}"
+
+    def _user_key(self, user_id):
+        return f"{self.options['KEY_PREFIX']}:user:{user_id}"
+
+    def _version_key(self, user_id):
+        return f"{self.options['KEY_PREFIX']}:version:{user_id}"
+
+    def version(self, user_id):
+        """The user's current version, created if there is none yet."""
+        key = self._version_key(user_id)
+        version = self.shared.get(key)
+        if version is None:
+            self.shared.add(key, secrets.token_hex(8), None)
+            version = self.shared.get(key)
+        return version
+
+    def get(self, key):
+        """Return the cached user for ``key``, or ``None`` on a miss or a stale entry."""
+        entry = self.local.get(key)
+        if entry is None:
+            entry = self.shared.get(self._token_key(key))
+            if entry is None:
+                return None
+            self.local.set(key, entry)
+        user_id, version, payload = entry
+        if version != self.version(user_id):
+            self.local.delete(key)
+            return None
+        return pickle.loads(payload)
+
+    def _entry(self, user, version):
+        return (user.pk, version, pickle.dumps(user, pickle.HIGHEST_PROTOCOL))
+
+    def set(self, key, user, version):
+        """Cache ``user`` for ``key``; ``version`` is ``version(user.pk)`` read before the load."""
+        entry = self._entry(user, version)
+        self.local.set(key, entry)
+        self.shared.set_many({
+            self._token_key(key): entry,
+            self._user_key(user.pk): key,
+        }, self.options['SHARED_TTL'])
+
+    def invalidate(self, key):
+        """Forget a single token key."""
+        self.local.delete(key)
+        self.shared.delete(self._token_key(key))
+
+    def get_user(self, user_id):
+        """The cached user for a signed access token's user id, or ``None``."""
+        return self.get(f'id:{user_id}')
+
+    def set_user(self, user, version):
+        entry = self._entry(user, version)
+        self.local.set(f'id:{user.pk}', entry)
+        self.shared.set(self._token_key(f'id:{user.pk}'), entry, self.options['SHARED_TTL'])
+
+    def invalidate_user(self, user_id):
+        """Make every cached copy of ``user_id`` stale, in all processes."""
+        self.shared.set(self._version_key(user_id), secrets.token_hex(8), None)
+        self.invalidate(f'id:{user_id}')
+        key = self.shared.get(self._user_key(user_id))
+        if key is not None:
+            self.invalidate(key)
+            self.shared.delete(self._user_key(user_id))
+
+    def clear(self):
+        self.local.clear()
+
+
+token_cache = TokenCache(getattr(settings, 'TOKEN_CACHE', None))
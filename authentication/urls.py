@@ -7,9 +7,16 @@ urlpatterns = [
     path('register/', views.RegisterView.as_view(), name='register'),
     path('login/', views.LoginView.as_view(), name='login'),
     path('logout/', views.LogoutView.as_view(), name='logout'),
+    path('token/refresh/', views.TokenRefreshView.as_view(), name='token_refresh'),
     path('profile/', views.ProfileView.as_view(), name='profile'),
     path('change-password/', views.ChangePasswordView.as_view(), name='change_password'),
     path('user-info/', views.user_info, name='user_info'),
     path('check-email/', views.check_email_exists, name='check_email'),
     path('check-username/', views.check_username_exists, name='check_username'),
+    path('check-availability/', views.check_availability, name='check_availability'),
+    path('users/', views.UserDirectoryView.as_view(), name='user_directory'),
+    path('users/search/', views.UserSearchView.as_view(), name='user_search'),
+    path('users/lookup/', views.ProfileLookupView.as_view(), name='user_lookup'),
+    path('export/', views.export_users, name='export_users'),
+    path('health/mongo/', views.mongo_health, name='mongo_health'),
 ]
@@ -1,9 +1,20 @@
-from django.contrib.auth import login, logout
+import datetime
+import logging
+from collections.abc import Mapping
+
+from django.conf import settings
+from django.contrib.auth import login, logout, user_logged_in
+from django.contrib.auth import password_validation
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.db.models import Q
+from django.http import HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET
 from rest_framework import status, generics, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, throttle_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.authtoken.models import Token
@@ -14,30 +25,64 @@ from .serializers import (
     UserRegistrationSerializer,
     UserLoginSerializer,
     UserProfileSerializer,
-    ChangePasswordSerializer
+    ChangePasswordSerializer,
+    AvailabilityBatchSerializer,
+    ProfileLookupSerializer,
+    UserDirectoryFilterSerializer,
+    identifier_value
 )
+from .access_tokens import access_tokens
+from .authentication import SignedTokenAuthentication
+from .availability import availability_index
+from .backends import EmailOrUsernameBackend
+from .compiled_serializers import user_profile
+from .exporting import CONTENT_TYPES, STREAMERS
+from .hash_pool import hash_pool
+from .metrics import scrape_allowed
+from .mongo import mongo_connection
+from .pagination import DateJoinedCursorPagination
+from .profile_cache import profile_cache
+from .ratelimit import CheckThrottle, LoginThrottle, RegisterThrottle, rate_limiter
+from .search import search_index
+from .token_cache import token_cache
 
 User = get_user_model()
 
+logger = logging.getLogger(__name__)
+
+backend = EmailOrUsernameBackend()
+
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserRegistrationSerializer
+    # No authentication: nothing here needs request.user, and resolving a
+    # token or session would cost a query before the throttle runs
+    authentication_classes = []
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [RegisterThrottle]
     
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            user = serializer.save()
-            token, created = Token.objects.get_or_create(user=user)
+            # A brand-new user has no token yet, so create it directly
+            # instead of get_or_create's extra SELECT.
+            with transaction.atomic():
+                user = serializer.save()
+                if access_tokens.enabled:
+                    tokens = access_tokens.issue(user)
+                else:
+                    tokens = {'token': Token.objects.create(user=user).key}
             return Response({
                 'message': 'User registered successfully',
-                'user': UserProfileSerializer(user).data,
-                'token': token.key
+                'user': user_profile.to_representation(user),
+                **tokens
             }, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class LoginView(APIView):
+    authentication_classes = []
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [LoginThrottle]
     
     def post(self, request):
         serializer = UserLoginSerializer(
@@ -46,13 +91,32 @@ class LoginView(APIView):
         )
         if serializer.is_valid():
             user = serializer.validated_data['user']
-            login(request, user)
-            token, created = Token.objects.get_or_create(user=user)
+            rate_limiter.login_succeeded(serializer.validated_data['email_or_username'], user)
+            use_session = serializer.validated_data['session']
+            if use_session is None:
+                use_session = settings.LOGIN_CREATES_SESSION
+            if use_session:
+                login(request, user)
+            else:
+                # Token-only login: record it (last_login) without
+                # creating a session row.
+                user_logged_in.send(sender=user.__class__, request=request, user=user)
+            if access_tokens.enabled:
+                tokens = access_tokens.issue(user)
+            else:
+                token, created = Token.objects.get_or_create(user=user)
+                tokens = {'token': token.key}
             return Response({
                 'message': 'Login successful',
-                'user': UserProfileSerializer(user).data,
-                'token': token.key
+                'user': user_profile.to_representation(user),
+                **tokens
             }, status=status.HTTP_200_OK)
+        if 'non_field_errors' in serializer.errors and isinstance(request.data, Mapping):
+            # Wrong credentials (not a malformed request) count towards
+            # the account's lockout, under its email and its username
+            identifier = request.data.get('email_or_username')
+            account = backend.get_user_by_identifier(identifier) if isinstance(identifier, str) else None
+            rate_limiter.login_failed(identifier, account)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class LogoutView(APIView):
@@ -62,21 +126,153 @@ class LogoutView(APIView):
         try:
             # Delete the user's token
             token = Token.objects.get(user=request.user)
+            token_cache.invalidate(token.key)
             token.delete()
         except Token.DoesNotExist:
             pass
+        if access_tokens.enabled:
+            access_tokens.revoke_user(request.user)
         
         logout(request)
         return Response({
             'message': 'Logout successful'
         }, status=status.HTTP_200_OK)
 
+class TokenRefreshView(APIView):
+    """Exchange a refresh token for a new access and refresh token"""
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    
+    def post(self, request):
+        if not access_tokens.enabled:
+            return Response({'error': 'Access tokens are not enabled'}, status=status.HTTP_404_NOT_FOUND)
+        refresh = request.data.get('refresh')
+        if not refresh or not isinstance(refresh, str):
+            return Response({'error': 'refresh is required'}, status=status.HTTP_400_BAD_REQUEST)
+        user, tokens = access_tokens.rotate(refresh)
+        return Response(tokens)
+    
+    def get_authenticate_header(self, request):
+        # A rejected refresh token is a 401, as for a rejected access token
+        return SignedTokenAuthentication.keyword
+
 class ProfileView(generics.RetrieveUpdateAPIView):
     serializer_class = UserProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_object(self):
         return self.request.user
+    
+    def retrieve(self, request, *args, **kwargs):
+        return profile_cache.response(request, request.user)
+
+class UserDirectoryView(generics.ListAPIView):
+    """Staff-only user listing, newest first, with keyset pagination"""
+    serializer_class = UserProfileSerializer
+    permission_classes = [permissions.IsAdminUser]
+    pagination_class = DateJoinedCursorPagination
+    
+    def get_queryset(self):
+        filters = UserDirectoryFilterSerializer(data=self.request.query_params)
+        filters.is_valid(raise_exception=True)
+        params = filters.validated_data
+        
+        queryset = User.objects.all()
+        for field in ('university', 'blood_group', 'gender'):
+            if field in params:
+                queryset = queryset.filter(**{field: params[field]})
+        # Whole days in the current timezone, as ranges the index can use
+        if 'joined_after' in params:
+            queryset = queryset.filter(date_joined__gte=start_of_day(params['joined_after']))
+        if 'joined_before' in params:
+            queryset = queryset.filter(
+                date_joined__lt=start_of_day(params['joined_before'] + datetime.timedelta(days=1))
+            )
+        if 'born_after' in params:
+            queryset = queryset.filter(date_of_birth__gte=params['born_after'])
+        if 'born_before' in params:
+            queryset = queryset.filter(date_of_birth__lte=params['born_before'])
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        return self.get_paginated_response([user_profile.to_representation(user) for user in page])
+
+
+def start_of_day(date):
+    return timezone.make_aware(datetime.datetime.combine(date, datetime.time()))
+
+class UserSearchView(APIView):
+    """Staff-only ranked search on name, username and email"""
+    permission_classes = [permissions.IsAdminUser]
+    
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.query_params.get('limit', 20))
+        except ValueError:
+            return Response({'error': 'limit must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        results = []
+        for user, score in search_index.search(query, limit=max(limit, 1)):
+            results.append({**user_profile.to_representation(user), 'score': score})
+        return Response({'results': results})
+
+class ProfileLookupView(APIView):
+    """
+    Profiles of many active users by id or username, in one query.
+    
+    ``?fields=id,username`` limits the columns loaded and returned. Other
+    users' contact details are for staff only, so everyone else gets (and
+    may ask for) ``PUBLIC_FIELDS``.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    PUBLIC_FIELDS = ('id', 'username', 'first_name', 'last_name', 'university', 'blood_group', 'gender')
+    
+    def post(self, request):
+        allowed = UserProfileSerializer.Meta.fields if request.user.is_staff else self.PUBLIC_FIELDS
+        fields = request.query_params.get('fields')
+        if fields is None:
+            fields = allowed
+        else:
+            fields = [name.strip() for name in fields.split(',') if name.strip()]
+            unknown = [name for name in fields if name not in allowed]
+            if not fields or unknown:
+                return Response(
+                    {'fields': f"Choose from: {', '.join(allowed)}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        serializer = ProfileLookupSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        ids = serializer.validated_data['ids']
+        usernames = serializer.validated_data['usernames']
+        
+        # id and username are loaded anyway, to match rows to the request
+        users = User.objects.filter(
+            Q(pk__in=ids) | Q(username__in=usernames), is_active=True
+        ).only('id', 'username', *fields)
+        by_id = {}
+        by_username = {}
+        for user in users:
+            by_id[user.pk] = by_username[user.username] = user
+        
+        # In request order, once each
+        found = {}
+        for user in [by_id.get(pk) for pk in ids] + [by_username.get(name) for name in usernames]:
+            if user is not None:
+                found.setdefault(user.pk, user)
+        projection = user_profile.project(fields)
+        return Response({
+            'results': [projection.to_representation(user) for user in found.values()],
+            'not_found': {
+                'ids': [pk for pk in ids if pk not in by_id],
+                'usernames': [name for name in usernames if name not in by_username],
+            },
+        })
 
 class ChangePasswordView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -88,12 +284,25 @@ class ChangePasswordView(APIView):
         )
         if serializer.is_valid():
             user = request.user
-            user.set_password(serializer.validated_data['new_password'])
-            user.save()
+            new_password = serializer.validated_data['new_password']
+            user.password = hash_pool.make_password(new_password)
+            user.save(update_fields=['password'])
+            # As set_password() would, for validators that track history
+            password_validation.password_changed(new_password, user)
+            
+            if access_tokens.enabled:
+                # Sign out every other client, then issue this one new tokens
+                Token.objects.filter(user=user).delete()
+                access_tokens.revoke_user(user)
+                return Response({
+                    'message': 'Password changed successfully',
+                    **access_tokens.issue(user)
+                }, status=status.HTTP_200_OK)
             
             # Update token
             try:
                 token = Token.objects.get(user=user)
+                token_cache.invalidate(token.key)
                 token.delete()
                 new_token = Token.objects.create(user=user)
             except Token.DoesNotExist:
@@ -109,27 +318,78 @@ class ChangePasswordView(APIView):
 @permission_classes([permissions.IsAuthenticated])
 def user_info(request):
     """Get current user information"""
-    serializer = UserProfileSerializer(request.user)
-    return Response(serializer.data)
+    return profile_cache.response(request, request.user)
 
 @api_view(['POST'])
+@authentication_classes([])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([CheckThrottle])
 def check_email_exists(request):
     """Check if email already exists"""
-    email = request.data.get('email')
-    if not email:
+    email = identifier_value(request.data, 'email')
+    if email is None:
         return Response({'error': 'Email is required'}, status=status.HTTP_400_BAD_REQUEST)
     
-    exists = User.objects.filter(email=email).exists()
+    exists = availability_index.exists('email', email)
     return Response({'exists': exists})
 
 @api_view(['POST'])
+@authentication_classes([])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([CheckThrottle])
 def check_username_exists(request):
     """Check if username already exists"""
-    username = request.data.get('username')
-    if not username:
+    username = identifier_value(request.data, 'username')
+    if username is None:
         return Response({'error': 'Username is required'}, status=status.HTTP_400_BAD_REQUEST)
     
-    exists = User.objects.filter(username=username).exists()
+    exists = availability_index.exists('username', username)
     return Response({'exists': exists})
+
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([permissions.AllowAny])
+@throttle_classes([CheckThrottle])
+def check_availability(request):
+    """Check many emails and usernames at once"""
+    serializer = AvailabilityBatchSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'emails': availability_index.exists_many('email', serializer.validated_data['emails']),
+        'usernames': availability_index.exists_many('username', serializer.validated_data['usernames']),
+    })
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def export_users(request):
+    """Stream all users as CSV or NDJSON (?output=csv|ndjson)"""
+    # ?format= is taken by DRF's content negotiation
+    output = request.query_params.get('output', 'csv')
+    if output not in STREAMERS:
+        return Response(
+            {'error': f"output must be one of: {', '.join(STREAMERS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    response = StreamingHttpResponse(
+        (chunk.encode('utf-8') for chunk in STREAMERS[output]()),
+        content_type=CONTENT_TYPES[output]
+    )
+    response['Content-Disposition'] = f'attachment; filename="users.{output}"'
+    return response
+
+
+@require_GET
+def mongo_health(request):
+    """Health probe for the MongoDB profile store, for staff or the metrics scrape token"""
+    if not scrape_allowed(request):
+        return HttpResponseForbidden()
+    result = mongo_connection.ping()
+    if not result['ok']:
+        # Driver errors can name hosts and credentials from the URI
+        logger.warning('MongoDB health check failed: %s', result['error'])
+        result = {'ok': False, 'error': 'MongoDB is unavailable'}
+    return JsonResponse(result, status=status.HTTP_200_OK if result['ok'] else status.HTTP_503_SERVICE_UNAVAILABLE)
@@ -0,0 +1,341 @@
+"""
+Load-test the API: throughput, tail latency and SQL queries per request.
+
+Each workload sends ``--requests`` requests from ``--concurrency`` threads
+against a population of ``--users`` users that all share one password:
+
+    check-email, check-username   half taken, half free values
+    register                      a new user per request
+    login                         token login as a random user
+    profile, user-info            GET with a random user's token
+    logout                        one request per user token (run last)
+
+By default the app runs in-process through Django's test Client on a
+throwaway test database, with the rate limiter off, and every request's
+queries are counted. With ``--base-url`` the workloads go over HTTP to a
+running server instead (start it with ``RATE_LIMITS_ENABLED=False``); the
+population is then registered through the API and queries are not
+reported.
+
+``--output`` saves the results as JSON together with the commit, database
+and settings of the run, and ``--compare`` prints the change against an
+earlier file, so regressions show up between commits:
+
+    python -m benchmarks.bench_api --output before.json
+    git checkout my-branch
+    python -m benchmarks.bench_api --compare before.json --output after.json
+
+Usage:
+    python -m benchmarks.bench_api [--users N] [--requests N] [--concurrency N]
+        [--workloads a,b] [--base-url URL] [--output FILE] [--compare FILE]
+"""
+
+import argparse
+import datetime
+import http.client
+import json
+import random
+import subprocess
+import threading
+import time
+import urllib.parse
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from benchmarks.common import ROOT, setup_django, summarize, test_database
+
+PASSWORD = 'BenchPassword123!'
+WORKLOADS = ('check-email', 'check-username', 'register', 'login', 'profile', 'user-info', 'logout')
+
+
+class InProcessTarget:
+    """Requests through Django's test Client, counting queries per request."""
+    name = 'in-process'
+
+    def send(self, method, path, body, headers):
+        from django.db import connection
+        from django.test import Client
+
+        extra = {'HTTP_' + name.upper().replace('-', '_'): value for name, value in headers.items()}
+        queries = [0]
+
+        def count(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        # A new client per request, so no cookies carry over
+        client = Client()
+        with connection.execute_wrapper(count):
+            if body is None:
+                response = getattr(client, method)(path, **extra)
+            else:
+                response = getattr(client, method)(
+                    path, json.dumps(body), content_type='application/json', **extra
+                )
+        return response.status_code, response.content, queries[0]
+
+    def close(self):
+        from django.db import connections
+
+        connections.close_all()
+
+
+class HttpTarget:
+    """Requests over a keep-alive HTTP connection per thread."""
+
+    def __init__(self, base_url):
+        self.name = base_url
+        parts = urllib.parse.urlsplit(base_url)
+        self.connection_class = (
+            http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        )
+        self.netloc = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.local = threading.local()
+
+    def send(self, method, path, body, headers):
+        payload = None if body is None else json.dumps(body)
+        headers = {'Content-Type': 'application/json', **headers}
+        for attempt in range(2):
+            connection = getattr(self.local, 'connection', None)
+            if connection is None:
+                connection = self.local.connection = self.connection_class(self.netloc, timeout=30)
+            try:
+                connection.request(method.upper(), self.prefix + path, body=payload, headers=headers)
+                response = connection.getresponse()
+                return response.status, response.read(), None
+            except (http.client.HTTPException, ConnectionError):
+                # The server closed an idle keep-alive connection
+                connection.close()
+                self.local.connection = None
+                if attempt:
+                    raise
+
+    def close(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is not None:
+            connection.close()
+
+
+def run(target, requests, concurrency):
+    """
+    Send ``requests`` (method, path, body, headers); return their summary
+    and, in request order, ``(seconds, status, content, queries)`` each.
+    """
+
+    results = [None] * len(requests)
+
+    def worker(indexes):
+        try:
+            for i in indexes:
+                start = time.perf_counter()
+                status, content, queries = target.send(*requests[i])
+                results[i] = (time.perf_counter() - start, status, content, queries)
+        finally:
+            target.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(worker, [range(i, len(requests), concurrency) for i in range(concurrency)]))
+    stats = summarize([result[0] for result in results], time.perf_counter() - start)
+    stats['errors'] = sum(1 for result in results if result[1] >= 400)
+    stats['queries_per_request'] = (
+        None if results[0][3] is None else sum(result[3] for result in results) / len(results)
+    )
+    return stats, results
+
+
+def register_body(username):
+    return {
+        'username': username, 'email': f'{username}@example.com',
+        'password': PASSWORD, 'password_confirm': PASSWORD,
+        'first_name': 'Bench', 'last_name': 'User',
+    }
+
+
+def auth_header(body):
+    """The Authorization header for a login or register response."""
+    if 'access' in body:
+        return {'Authorization': f"Bearer {body['access']}"}
+    return {'Authorization': f"Token {body['token']}"}
+
+
+def create_population(count):
+    """Users with tokens, created directly in the database."""
+    from django.contrib.auth.hashers import make_password
+    from rest_framework.authtoken.models import Token
+
+    from authentication.models import User
+
+    password = make_password(PASSWORD)
+    User.objects.bulk_create(
+        [
+            User(
+                username=f'bench{i}', email=f'bench{i}@example.com', password=password,
+                first_name='Bench', last_name=str(i)
+            )
+            for i in range(count)
+        ],
+        batch_size=1000,
+    )
+    users = list(User.objects.filter(username__startswith='bench').order_by('pk'))
+    tokens = [Token(key=Token.generate_key(), user=user) for user in users]
+    Token.objects.bulk_create(tokens, batch_size=1000)
+    return [
+        {'username': user.username, 'email': user.email, 'headers': {'Authorization': f'Token {token.key}'}}
+        for user, token in zip(users, tokens)
+    ]
+
+
+def register_population(target, count, concurrency, run_id):
+    """Users registered through the API of a running server."""
+    from django.urls import reverse
+
+    usernames = [f'bench{run_id}p{i}' for i in range(count)]
+    requests = [('post', reverse('authentication:register'), register_body(name), {}) for name in usernames]
+    stats, results = run(target, requests, concurrency)
+    if stats['errors']:
+        raise SystemExit(f"{stats['errors']} of {count} registrations failed: {results[0][2][:200]!r}")
+    return [
+        {'username': name, 'email': f'{name}@example.com', 'headers': auth_header(json.loads(result[2]))}
+        for name, result in zip(usernames, results)
+    ]
+
+
+def build_requests(workload, population, count, rng, run_id):
+    from django.urls import reverse
+
+    def url(name):
+        return reverse(f'authentication:{name}')
+
+    if workload in ('check-email', 'check-username'):
+        field = workload.split('-')[1]
+        free = '{}@example.com' if field == 'email' else '{}'
+        return [
+            (
+                'post', url(f'check_{field}'),
+                {field: rng.choice(population)[field] if i % 2 else free.format(f'free{i}')}, {}
+            )
+            for i in range(count)
+        ]
+    if workload == 'register':
+        return [('post', url('register'), register_body(f'new{run_id}r{i}'), {}) for i in range(count)]
+    if workload == 'login':
+        return [
+            (
+                'post', url('login'),
+                {'email_or_username': rng.choice(population)['username'], 'password': PASSWORD}, {}
+            )
+            for _ in range(count)
+        ]
+    if workload in ('profile', 'user-info'):
+        name = 'profile' if workload == 'profile' else 'user_info'
+        return [('get', url(name), None, rng.choice(population)['headers']) for _ in range(count)]
+    if workload == 'logout':
+        # Each token can only log out once
+        return [('post', url('logout'), None, user['headers']) for user in population[:count]]
+    raise ValueError(f'Unknown workload {workload!r}')
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    print(
+        f"\n{'workload':<16} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+        f"{'queries':>8} {'errors':>7}" + (f" {'req/s vs base':>14} {'p95 vs base':>12}" if baseline else '')
+    )
+    for workload, stats in results.items():
+        queries = '-' if stats['queries_per_request'] is None else f"{stats['queries_per_request']:.1f}"
+        line = (
+            f"{workload:<16} {stats['rps']:>9.1f} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} "
+            f"{stats['p99_ms']:>9.2f} {queries:>8} {stats['errors']:>7}"
+        )
+        before = (baseline or {}).get(workload)
+        if before:
+            line += (
+                f" {(stats['rps'] / before['rps'] - 1) * 100:>+13.1f}%"
+                f" {(stats['p95_ms'] / before['p95_ms'] - 1) * 100:>+11.1f}%"
+            )
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--workloads', default=','.join(WORKLOADS))
+    parser.add_argument('--base-url', help='drive a running server, e.g. http://127.0.0.1:8000')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare with')
+    args = parser.parse_args()
+
+    workloads = [name.strip() for name in args.workloads.split(',') if name.strip()]
+    unknown = set(workloads) - set(WORKLOADS)
+    if unknown:
+        parser.error(f"unknown workloads: {', '.join(sorted(unknown))}")
+    # logout spends the population's tokens
+    workloads.sort(key=WORKLOADS.index)
+
+    setup_django()
+    with nullcontext() if args.base_url else test_database():
+        from django.conf import settings
+        from django.db import connection
+
+        run_id = uuid.uuid4().hex[:6]
+        if args.base_url:
+            target = HttpTarget(args.base_url)
+            population = register_population(target, args.users, args.concurrency, run_id)
+            database = None
+        else:
+            from authentication.availability import availability_index
+            from authentication.ratelimit import rate_limiter
+
+            # Every request comes from one address; measure the views, not 429s
+            rate_limiter.options['ENABLED'] = False
+            target = InProcessTarget()
+            population = create_population(args.users)
+            availability_index.reset()
+            database = connection.vendor
+
+        rng = random.Random(args.seed)
+        results = {}
+        for workload in workloads:
+            requests = build_requests(workload, population, args.requests, rng, run_id)
+            results[workload], _ = run(target, requests, args.concurrency)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    print(f"\nAPI load test ({target.name}, {args.users} users, concurrency {args.concurrency})")
+    print_results(results, baseline)
+
+    if args.output:
+        report = {
+            'commit': git_commit(),
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'target': target.name,
+            'database': database,
+            'password_hasher': settings.PASSWORD_HASHERS[0],
+            'users': args.users,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'\nResults written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Compare the WSGI (DRF) endpoints with their async ASGI counterparts.
+
+Both stacks run in-process: the WSGI views through Django's test Client on a
+pool of threads, the async views through AsyncClient on one event loop with
+the same number of requests in flight.
+
+Usage:
+    python -m benchmarks.bench_asgi [--concurrency N] [--requests N]
+"""
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import setup_django, summarize, test_database
+
+
+def print_results(rows):
+    print(f"\n{'workload':<34} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for label, stats in rows.items():
+        print(
+            f"{label:<34} {stats['rps']:>9.1f} {stats['p50_ms']:>9.2f} "
+            f"{stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f}"
+        )
+
+
+def run_wsgi(path, method, body, headers, concurrency, count):
+    from django.db import connections
+    from django.test import Client
+
+    def one(_):
+        client = Client()
+        start = time.perf_counter()
+        getattr(client, method)(path, body, content_type='application/json', **headers)
+        return time.perf_counter() - start
+
+    def worker(n):
+        try:
+            return [one(i) for i in range(n)]
+        finally:
+            connections.close_all()
+
+    per_worker = [count // concurrency] * concurrency
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = [t for chunk in pool.map(worker, per_worker) for t in chunk]
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def run_asgi(path, method, body, headers, concurrency, count):
+    from django.test import AsyncClient
+
+    # AsyncClient sends extras as raw header names.
+    headers = {key[5:].lower().replace('_', '-'): value for key, value in headers.items()}
+
+    async def main():
+        client = AsyncClient()
+        gate = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def one():
+            async with gate:
+                start = time.perf_counter()
+                await getattr(client, method)(path, body, content_type='application/json', **headers)
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(count)))
+        return summarize(latencies, time.perf_counter() - start)
+
+    return asyncio.run(main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=400)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        from django.urls import reverse
+        from rest_framework.authtoken.models import Token
+
+        from authentication.models import User
+        from authentication.ratelimit import rate_limiter
+
+        # Every request comes from one address; measure the views, not 429s
+        rate_limiter.options['ENABLED'] = False
+        user = User.objects.create_user(
+            username='benchuser', email='bench@example.com',
+            password='BenchPassword123!', first_name='Bench', last_name='User'
+        )
+        auth = {'HTTP_AUTHORIZATION': f'Token {Token.objects.create(user=user).key}'}
+        login = {'email_or_username': 'benchuser', 'password': 'BenchPassword123!'}
+
+        workloads = {
+            'login': ('login', 'post', login, {}),
+            'profile': ('profile', 'get', None, auth),
+            'check-email': ('check_email', 'post', {'email': 'free@example.com'}, {}),
+        }
+        rows = {}
+        for label, (name, method, body, headers) in workloads.items():
+            # The login workload is hash-bound, so keep it shorter.
+            count = args.requests // 4 if label == 'login' else args.requests
+            rows[f'{label} (WSGI)'] = run_wsgi(
+                reverse(f'authentication:{name}'), method, body, headers, args.concurrency, count
+            )
+            rows[f'{label} (ASGI)'] = run_asgi(
+                reverse(f'authentication_async:{name}'), method, body, headers, args.concurrency, count
+            )
+        print_results(rows)
+
+
+if __name__ == '__main__':
+    main()
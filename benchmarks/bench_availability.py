@@ -0,0 +1,84 @@
+"""
+Compare N single-item availability checks with one batch request.
+
+Half of the checked values belong to existing users and half are free, and
+each flow runs with the availability index both enabled and disabled.
+
+Usage:
+    python -m benchmarks.bench_availability [--users N] [--batch N] [--iterations N]
+"""
+
+import argparse
+
+from benchmarks.common import measure, print_table, setup_django, test_database
+
+
+def create_users(count):
+    from django.contrib.auth.hashers import make_password
+
+    from authentication.models import User
+
+    password = make_password('BenchPassword123!')
+    User.objects.bulk_create(
+        [
+            User(
+                username=f'user{i}', email=f'user{i}@example.com', password=password,
+                first_name='Bench', last_name=str(i)
+            )
+            for i in range(count)
+        ],
+        batch_size=1000,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--batch', type=int, default=50)
+    parser.add_argument('--iterations', type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        from django.urls import reverse
+        from rest_framework.test import APIClient
+
+        from authentication.availability import availability_index
+        from authentication.ratelimit import rate_limiter
+
+        # Every request comes from one address; measure the views, not 429s
+        rate_limiter.options['ENABLED'] = False
+        create_users(args.users)
+        client = APIClient()
+        half = args.batch // 2
+        emails = [f'user{i}@example.com' for i in range(half)]
+        emails += [f'free{i}@example.com' for i in range(args.batch - half)]
+        usernames = [f'user{i}' for i in range(half)]
+        usernames += [f'free{i}' for i in range(args.batch - half)]
+
+        def single():
+            for email in emails:
+                client.post(reverse('authentication:check_email'), {'email': email}, format='json')
+            for username in usernames:
+                client.post(reverse('authentication:check_username'), {'username': username}, format='json')
+
+        def batch():
+            client.post(
+                reverse('authentication:check_availability'),
+                {'emails': emails, 'usernames': usernames}, format='json'
+            )
+
+        rows = {}
+        for enabled in (False, True):
+            availability_index.options['ENABLED'] = enabled
+            availability_index.reset()
+            if enabled:
+                availability_index.build()
+            label = 'index on' if enabled else 'index off'
+            rows[f'{2 * args.batch} single requests ({label})'] = measure(single, args.iterations)
+            rows[f'1 batch request ({label})'] = measure(batch, args.iterations)
+        print_table(f'availability checks against {args.users} users', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Compare keyset and offset pagination of the user directory at increasing depth.
+
+Keyset pages are fetched through the ``users/`` endpoint and through the
+paginator alone, with a cursor pointing at the given depth; offset pages
+run the equivalent ``ORDER BY ... LIMIT n OFFSET k`` query that
+``PageNumberPagination`` would issue. Keyset times should stay flat while
+offset times grow with depth.
+
+Usage:
+    python -m benchmarks.bench_directory [--users N] [--page-size N] [--iterations N]
+"""
+
+import argparse
+import datetime
+
+from benchmarks.common import measure, print_table, setup_django, test_database
+
+
+def create_users(count):
+    from django.utils import timezone
+
+    from authentication.models import User
+
+    start = timezone.now()
+    universities = ['DU', 'BUET', 'KUET', 'RUET', 'CUET']
+    batch = []
+    for i in range(count):
+        batch.append(User(
+            username=f'user{i}', email=f'user{i}@example.com', password='!',
+            first_name='Bench', last_name=str(i), university=universities[i % len(universities)],
+            date_joined=start - datetime.timedelta(minutes=i // 3),
+        ))
+        if len(batch) == 5000:
+            User.objects.bulk_create(batch)
+            batch = []
+    User.objects.bulk_create(batch)
+
+
+def client_request(params):
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    return Request(APIRequestFactory().get('/', params))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--page-size', type=int, default=20)
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        from django.urls import reverse
+        from rest_framework.test import APIClient
+
+        from authentication.models import User
+        from authentication.pagination import DateJoinedCursorPagination
+
+        create_users(args.users)
+        staff = User.objects.create_user(
+            username='staff', email='staff@example.com', password='x',
+            first_name='Staff', last_name='User', is_staff=True
+        )
+        client = APIClient()
+        client.force_authenticate(staff)
+        url = reverse('authentication:user_directory')
+        ordered = User.objects.order_by('-date_joined', '-id')
+        paginator = DateJoinedCursorPagination()
+
+        rows = {}
+        for fraction in (0, 0.1, 0.5, 0.9):
+            depth = int(args.users * fraction)
+            params = {'page_size': args.page_size}
+            if depth:
+                anchor = ordered.values_list('date_joined', 'id')[depth - 1]
+                params['cursor'] = paginator.encode_cursor(anchor)
+
+            rows[f'keyset API, depth {depth}'] = measure(
+                lambda: client.get(url, params), args.iterations
+            )
+            rows[f'keyset query, depth {depth}'] = measure(
+                lambda: paginator.paginate_queryset(User.objects.all(), client_request(params)),
+                args.iterations,
+            )
+            rows[f'offset query, depth {depth}'] = measure(
+                lambda: list(ordered[depth:depth + args.page_size]), args.iterations
+            )
+
+        print_table(f'User directory pages ({args.users} users, {args.page_size} per page)', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Compare the legacy login flow with EmailOrUsernameBackend.
+
+The legacy flow is the one UserLoginSerializer used to run: authenticate
+with the input as an email, then look the user up by username and
+authenticate a second time.
+
+Usage:
+    python -m benchmarks.bench_login [--iterations N]
+"""
+
+import argparse
+from unittest import mock
+
+from benchmarks.common import measure, print_table, setup_django, test_database
+
+
+def legacy_authenticate(request, email_or_username, password):
+    from django.contrib.auth import authenticate
+    from django.test import override_settings
+
+    from authentication.models import User
+
+    backends = ['django.contrib.auth.backends.ModelBackend']
+    with override_settings(AUTHENTICATION_BACKENDS=backends):
+        user = authenticate(request, username=email_or_username, password=password)
+        if not user:
+            try:
+                user_obj = User.objects.get(username=email_or_username)
+                user = authenticate(request, username=user_obj.email, password=password)
+            except User.DoesNotExist:
+                pass
+    return user
+
+
+def current_authenticate(request, email_or_username, password):
+    from django.contrib.auth import authenticate
+
+    return authenticate(request, username=email_or_username, password=password)
+
+
+def count_hashes(func):
+    """Return how many times ``func`` runs the default password hasher."""
+    from django.contrib.auth.hashers import get_hasher
+
+    hasher_class = type(get_hasher())
+    calls = []
+    depth = [0]
+
+    def counting(method):
+        def wrapper(self, *args, **kwargs):
+            # verify() may call encode(); only count the outermost call.
+            if not depth[0]:
+                calls.append(method.__name__)
+            depth[0] += 1
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                depth[0] -= 1
+        return wrapper
+
+    with mock.patch.object(hasher_class, 'encode', counting(hasher_class.encode)), \
+            mock.patch.object(hasher_class, 'verify', counting(hasher_class.verify)):
+        func()
+    return len(calls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        from authentication.models import User
+
+        User.objects.create_user(
+            username='benchuser', email='bench@example.com',
+            password='BenchPassword123!', first_name='Bench', last_name='User'
+        )
+
+        cases = {
+            'email, correct password': ('bench@example.com', 'BenchPassword123!'),
+            'username, correct password': ('benchuser', 'BenchPassword123!'),
+            'username, wrong password': ('benchuser', 'wrong-password'),
+            'unknown identifier': ('nobody', 'BenchPassword123!'),
+        }
+        for name, flow in (('legacy', legacy_authenticate), ('backend', current_authenticate)):
+            rows = {}
+            for label, (identifier, password) in cases.items():
+                call = lambda: flow(None, identifier, password)  # noqa: E731
+                stats = measure(call, args.iterations)
+                rows[f"{label} [{count_hashes(call)} hash]"] = stats
+            print_table(f"{name} flow", rows)
+
+
+if __name__ == '__main__':
+    main()
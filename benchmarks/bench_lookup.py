@@ -0,0 +1,82 @@
+"""
+Compare one bulk profile lookup with a profile request per user.
+
+A list page that shows N members can fetch them with a single
+``POST users/lookup/`` or with N profile requests, one per member (what
+clients had to do before the lookup endpoint existed). Both go through the
+full request stack with token authentication. The profile cache is cleared
+before each round, so the N requests pay for rendering as they would on a
+page no one has opened lately; a second case shows them with the cache warm.
+The lookup is also timed with a two-column ``fields=`` projection.
+
+Usage:
+    python -m benchmarks.bench_lookup [--users N] [--batch N] [--iterations N]
+"""
+
+import argparse
+
+from benchmarks.common import measure, print_table, setup_django, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--batch', type=int, default=50, help='profiles per page')
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        from django.urls import reverse
+        from rest_framework.authtoken.models import Token
+        from rest_framework.test import APIClient
+
+        from authentication.models import User
+        from authentication.profile_cache import profile_cache
+        from authentication.ratelimit import rate_limiter
+
+        rate_limiter.options['ENABLED'] = False
+        User.objects.bulk_create(
+            [
+                User(
+                    username=f'member{i}', email=f'member{i}@example.com', password='!',
+                    first_name='Member', last_name=str(i), university='BUET', blood_group='B+',
+                    address='House 12, Road 5, Dhanmondi, Dhaka',
+                )
+                for i in range(args.users)
+            ],
+            batch_size=1000,
+        )
+        users = list(User.objects.order_by('pk')[:args.batch])
+        tokens = [Token.objects.create(user=user).key for user in users]
+        ids = [user.pk for user in users]
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {tokens[0]}')
+        lookup_url = reverse('authentication:user_lookup')
+        profile_url = reverse('authentication:profile')
+        single = APIClient()
+
+        def profiles(clear):
+            if clear:
+                for pk in ids:
+                    profile_cache.invalidate(pk)
+            for token in tokens:
+                single.get(profile_url, HTTP_AUTHORIZATION=f'Token {token}')
+
+        rows = {
+            f'{args.batch} x GET profile/ (cold cache)': measure(lambda: profiles(True), args.iterations),
+            f'{args.batch} x GET profile/ (warm cache)': measure(lambda: profiles(False), args.iterations),
+            f'POST users/lookup/ ({args.batch} ids)': measure(
+                lambda: client.post(lookup_url, {'ids': ids}, format='json'), args.iterations
+            ),
+            'POST users/lookup/?fields=id,username': measure(
+                lambda: client.post(f'{lookup_url}?fields=id,username', {'ids': ids}, format='json'),
+                args.iterations,
+            ),
+        }
+        print_table(f'Profiles for a page of {args.batch} users ({args.users} in the table)', rows)
+
+
+if __name__ == '__main__':
+    main()
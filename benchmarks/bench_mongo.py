@@ -0,0 +1,113 @@
+"""
+Measure MongoDB connection startup cost and profile-sync write throughput.
+
+Startup reports what process boot pays (registering the lazy connection)
+against what the first MongoDB operation pays (opening the pool and a
+round trip). Throughput compares one ``UserProfile.save()``
+per user, spread over a thread pool sharing the per-process client, with
+the outbox store's batched bulk upserts.
+
+Runs against mongomock by default; pass ``--host`` to use a real server.
+mongomock scans the whole collection for every upsert filter, so its
+throughput figures mostly measure the stand-in; compare write paths on a
+real server.
+
+Usage:
+    python -m benchmarks.bench_mongo [--host URI] [--profiles N] [--threads N] [--batch N]
+"""
+
+import argparse
+import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import setup_django, summarize
+
+
+def profile_documents(count):
+    now = datetime.datetime.utcnow()
+    return [
+        {
+            'django_user_id': str(i), 'username': f'user{i}', 'email': f'user{i}@example.com',
+            'first_name': 'Bench', 'last_name': str(i), 'university': 'DU',
+            'blood_group': 'O+', 'mobile_no': '', 'gender': 'N', 'date_of_birth': None,
+            'address': '', 'updated_at': now,
+        }
+        for i in range(count)
+    ]
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--host', help='MongoDB URI (default: mongomock)')
+    parser.add_argument('--profiles', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--batch', type=int, default=500)
+    args = parser.parse_args()
+
+    setup_django()
+    from authentication.mongo import mongo_connection
+    from authentication.mongo_models import UserProfile
+    from authentication.outbox import MongoProfileStore
+
+    options = {'NAME': 'login_reg_bench', 'MAX_POOL_SIZE': args.threads}
+    if args.host:
+        options['HOST'] = args.host
+    else:
+        options['MOCK'] = True
+
+    manager = mongo_connection
+    manager.disconnect()
+    manager.options.update(options)
+    print('\nStartup')
+    print(f"{'ensure_connected() (boot)':<34} {timed(manager.ensure_connected):>9.2f} ms")
+    print(f"{'first ping (first use)':<34} {timed(lambda: manager.get_db().command('ping')):>9.2f} ms")
+
+    documents = profile_documents(args.profiles)
+    collection = UserProfile._get_collection()
+
+    def save_one(doc):
+        start = time.perf_counter()
+        UserProfile(**{k: v for k, v in doc.items() if k != 'updated_at'}).save()
+        return time.perf_counter() - start
+
+    collection.delete_many({})
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as pool:
+        latencies = list(pool.map(save_one, documents))
+    single = summarize(latencies, time.perf_counter() - start)
+
+    collection.delete_many({})
+    store = MongoProfileStore()
+    store.collection  # noqa: B018 - connect outside the timed section
+    batches = [documents[i:i + args.batch] for i in range(0, len(documents), args.batch)]
+    latencies = []
+    start = time.perf_counter()
+    for batch in batches:
+        batch_start = time.perf_counter()
+        store.bulk_upsert(batch)
+        latencies.append(time.perf_counter() - batch_start)
+    wall = time.perf_counter() - start
+    bulk = summarize(latencies, wall)
+    collection.drop()
+    manager.disconnect()
+
+    print(f"\n{'workload':<34} {'docs/s':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    print(
+        f"{f'save() x{args.threads} threads':<34} {single['rps']:>10.0f} "
+        f"{single['p50_ms']:>9.2f} {single['p99_ms']:>9.2f}"
+    )
+    print(
+        f"{f'bulk upsert ({args.batch}/batch)':<34} {args.profiles / wall:>10.0f} "
+        f"{bulk['p50_ms']:>9.2f} {bulk['p99_ms']:>9.2f}"
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Measure what the rate limiter adds to each request.
+
+``rate_limiter.check`` is timed on its own with the local and the cache
+backend (the configured ``CACHES['default']``), over a spread of client
+addresses so the key map is realistically full. Then check-email is
+requested end to end with limiting off and on, which is the overhead a
+client actually sees, and once more from an address that is over its limit,
+which is what a flood costs the server.
+
+Usage:
+    python -m benchmarks.bench_ratelimit [--clients N] [--iterations N]
+"""
+
+import argparse
+import itertools
+import logging
+
+from benchmarks.common import measure, print_table, setup_django, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clients', type=int, default=50000)
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        from django.urls import reverse
+        from rest_framework.test import APIClient
+
+        from authentication.ratelimit import RateLimiter, rate_limiter
+
+        rules = {'check': {'ip': '1000000/m'}, 'login': {'ip': '1000000/m', 'account': '1000000/m'}}
+        addresses = [f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}' for i in range(args.clients)]
+
+        rows = {}
+        for backend in ('local', 'cache'):
+            limiter = RateLimiter({'BACKEND': backend, 'RULES': rules})
+            ips = itertools.cycle(addresses)
+            rows[f'check() per IP ({backend})'] = measure(
+                lambda: limiter.check('check', next(ips)), args.iterations
+            )
+            rows[f'check() per IP + account ({backend})'] = measure(
+                lambda: limiter.check('login', next(ips), 'someone@example.com'), args.iterations
+            )
+
+        client = APIClient()
+        url = reverse('authentication:check_email')
+        requests = max(args.iterations // 20, 1)
+        for enabled in (False, True):
+            rate_limiter.options.update({'ENABLED': enabled, 'RULES': rules})
+            rate_limiter.reset()
+            label = 'on' if enabled else 'off'
+            rows[f'check-email request (limiting {label})'] = measure(
+                lambda: client.post(url, {'email': 'free@example.com'}, format='json'), requests
+            )
+
+        # Django logs every 429 as a warning
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        rate_limiter.options['RULES'] = {'check': {'ip': '1/h'}}
+        rate_limiter.reset()
+        client.post(url, {'email': 'free@example.com'}, format='json')
+        rows['check-email request (throttled, 429)'] = measure(
+            lambda: client.post(url, {'email': 'free@example.com'}, format='json'), requests
+        )
+
+        print_table(f'Rate limiter overhead ({args.clients} client addresses)', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Compare trigram user search with the admin's old icontains OR-chain.
+
+Users get names drawn from small word lists plus a numeric suffix, and the
+trigram index is built with the same code as ``rebuild_search_index``. Each
+query then runs as the old ``LIKE '%term%'`` search over four columns and
+through ``search_index.search``. The icontains case includes the COUNT
+the admin changelist runs for its paginator. The last rows time the
+``post_save`` reindex that keeps the index current: a save that leaves the
+name alone and one that renames the user.
+
+The 1M-user run from the request is ``--users 1000000``; it needs a few GB
+of disk for the trigram table and takes a while to populate.
+
+Usage:
+    python -m benchmarks.bench_search [--users N] [--iterations N]
+"""
+
+import argparse
+import itertools
+import random
+import time
+
+from benchmarks.common import measure, print_table, setup_django, test_database
+
+FIRST_NAMES = ['john', 'mary', 'ahmed', 'fatima', 'rahim', 'karim', 'nusrat', 'tanvir', 'sadia', 'imran']
+LAST_NAMES = ['smith', 'khan', 'hossain', 'rahman', 'chowdhury', 'islam', 'ahmed', 'jones', 'akter', 'uddin']
+
+
+def create_users(count):
+    from authentication.models import User
+    from authentication.search import search_index
+
+    rng = random.Random(42)
+    batch = []
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        batch.append(User(
+            username=f'{first}{last}{i}', email=f'{first}.{last}{i}@example.com', password='!',
+            first_name=first.title(), last_name=last.title(),
+        ))
+        if len(batch) == 5000:
+            User.objects.bulk_create(batch)
+            batch = []
+    User.objects.bulk_create(batch)
+
+    start = time.perf_counter()
+    search_index.rebuild(batch_size=5000)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--iterations', type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        from django.db.models import Q
+
+        from authentication.models import User
+        from authentication.search import search_index
+
+        build_seconds = create_users(args.users)
+        print(f'Indexed {args.users} users in {build_seconds:.1f}s')
+
+        ordered = User.objects.order_by('-date_joined')
+        rows = {}
+        for term in ('chowdhury', 'tanvir rah', 'fatma', f'{args.users // 2}'):
+            icontains = Q()
+            for field in ('email', 'username', 'first_name', 'last_name'):
+                icontains |= Q(**{f'{field}__icontains': term})
+            # The changelist counts the matches and fetches the first page
+            rows[f'icontains "{term}"'] = measure(
+                lambda: (ordered.filter(icontains).count(), list(ordered.filter(icontains)[:20])),
+                args.iterations,
+            )
+            rows[f'trigram "{term}"'] = measure(
+                lambda: search_index.search(term, limit=20), args.iterations
+            )
+
+        user = User.objects.order_by('pk').first()
+        names = itertools.cycle([(first, last) for first in FIRST_NAMES for last in LAST_NAMES])
+
+        def rename():
+            user.first_name, user.last_name = next(names)
+            user.save()
+
+        rows['User.save() (name unchanged)'] = measure(user.save, args.iterations)
+        rows['User.save() (renamed)'] = measure(rename, args.iterations)
+
+        print_table(f'User search ({args.users} users, 20 results)', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Compare ``UserProfileSerializer`` with its precompiled ``user_profile`` form.
+
+Users are built in memory with every profile field filled in, so no query
+is involved. Each case produces the payload of one user (a profile or login
+response) and of a page of users (the directory), as a dict and as the
+rendered JSON bytes, first through DRF and then through
+``compiled_serializers.user_profile``. The compiled bytes are checked
+against DRF's before anything is timed.
+
+Usage:
+    python -m benchmarks.bench_serializer [--page N] [--iterations N]
+"""
+
+import argparse
+import datetime
+
+from benchmarks.common import measure, print_table, setup_django
+
+
+def make_users(count):
+    from django.utils import timezone
+
+    from authentication.models import User
+
+    now = timezone.now()
+    return [
+        User(
+            id=i + 1, username=f'user{i}', email=f'user{i}@example.com',
+            first_name='Nusrat', last_name='Jahan', university='BUET', blood_group='B+',
+            mobile_no='01700000000', gender='female', date_of_birth=datetime.date(2000, 1, 1),
+            address='House 12, Road 5, Dhanmondi, Dhaka', date_joined=now, last_login=now,
+            created_at=now, updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--page', type=int, default=50, help='users per list payload')
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+
+    from authentication.compiled_serializers import user_profile
+    from authentication.serializers import UserProfileSerializer
+
+    users = make_users(args.page)
+    user = users[0]
+    renderer = JSONRenderer()
+    if user_profile.render_many(users) != renderer.render(UserProfileSerializer(users, many=True).data):
+        raise SystemExit('compiled output differs from UserProfileSerializer')
+
+    list_iterations = max(args.iterations // args.page, 1)
+    rows = {
+        'one user, dict (DRF)': measure(lambda: UserProfileSerializer(user).data, args.iterations),
+        'one user, dict (compiled)': measure(lambda: user_profile.to_representation(user), args.iterations),
+        'one user, JSON (DRF)': measure(
+            lambda: renderer.render(UserProfileSerializer(user).data), args.iterations
+        ),
+        'one user, JSON (compiled)': measure(lambda: user_profile.render(user), args.iterations),
+        f'{args.page} users, dict (DRF)': measure(
+            lambda: UserProfileSerializer(users, many=True).data, list_iterations
+        ),
+        f'{args.page} users, dict (compiled)': measure(
+            lambda: [user_profile.to_representation(u) for u in users], list_iterations
+        ),
+        f'{args.page} users, JSON (DRF)': measure(
+            lambda: renderer.render(UserProfileSerializer(users, many=True).data), list_iterations
+        ),
+        f'{args.page} users, JSON (compiled)': measure(lambda: user_profile.render_many(users), list_iterations),
+    }
+    print_table('UserProfileSerializer vs compiled user_profile', rows)
+
+
+if __name__ == '__main__':
+    main()
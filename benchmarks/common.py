@@ -0,0 +1,91 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Each benchmark runs against a throwaway test database created from the
+configured ``DATABASES`` (the same way ``manage.py test`` does), so the
+numbers reflect the real backend without touching real data.
+"""
+
+import os
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def setup_django():
+    """Configure Django for a standalone benchmark run."""
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'login_reg_backend.settings')
+
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """Create a test database for the duration of the block."""
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def measure(func, iterations):
+    """Call ``func`` ``iterations`` times and return per-call stats."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    timings = []
+    with CaptureQueriesContext(connection) as ctx:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    return {
+        'iterations': iterations,
+        'mean_ms': statistics.mean(timings) * 1000,
+        'p50_ms': percentile(timings, 0.50) * 1000,
+        'p99_ms': percentile(timings, 0.99) * 1000,
+        'queries_per_call': len(ctx.captured_queries) / iterations,
+        'db_ms_per_call': sum(float(q['time']) for q in ctx.captured_queries) * 1000 / iterations,
+    }
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def summarize(latencies, wall_seconds):
+    """Throughput and tail latency for a concurrent run."""
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / wall_seconds,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+    }
+
+
+def print_table(title, rows):
+    """Print ``{label: stats}`` rows produced by :func:`measure`."""
+    print(f"\n{title}")
+    print(f"{'case':<40} {'mean ms':>10} {'p50 ms':>10} {'p99 ms':>10} {'queries':>8}")
+    for label, stats in rows.items():
+        print(
+            f"{label:<40} {stats['mean_ms']:>10.3f} {stats['p50_ms']:>10.3f} "
+            f"{stats['p99_ms']:>10.3f} {stats['queries_per_call']:>8.1f}"
+        )
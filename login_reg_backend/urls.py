@@ -18,6 +18,8 @@ from django.contrib import admin
 from django.urls import path, include
 from django.http import JsonResponse
 
+from authentication.metrics import metrics_view
+
 def api_root(request):
     return JsonResponse({
         'message': 'Welcome to Login & Registration Backend API',
@@ -30,6 +32,8 @@ def api_root(request):
             'user-info': '/api/auth/user-info/',
             'check-email': '/api/auth/check-email/',
             'check-username': '/api/auth/check-username/',
+            'check-availability': '/api/auth/check-availability/',
+            'async': '/api/async/auth/',
             'admin': '/admin/',
         }
     })
@@ -37,5 +41,7 @@ def api_root(request):
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/', include('authentication.urls')),
+    path('api/async/auth/', include('authentication.async_urls')),
+    path('metrics', metrics_view, name='metrics'),
     path('', api_root, name='api_root'),
 ]
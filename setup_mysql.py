@@ -201,7 +201,7 @@ def main():
             print("2. Run: python setup_mysql.py --migrate")
             print("3. Run: python manage.py createsuperuser")
             print("4. Run: python manage.py runserver")
-            print("5. Test: python test_api.py")
+            print("5. Test: python manage.py test authentication")
     
     elif len(sys.argv) > 1 and sys.argv[1] == '--migrate':
         print("\n🔄 Running migrations only...")